@@ -1,5 +1,224 @@
-from .elongation import *
-from .experiments import *
-from .graph_alg import *
-from .solvers import *
-from .outputers import *
+"""
+The submodules are imported lazily on the first access of one of their
+attributes, so that numpy, scipy and pulp are only loaded when they are needed.
+"""
+
+import ast
+import importlib
+import importlib.util
+import sys
+import time
+from typing import TYPE_CHECKING
+
+# The imports are only run by static type checkers. At run time the same block
+# maps each attribute to the submodule defining it, see _read_attributes.
+if TYPE_CHECKING:
+    from .analytics import (
+        TOP_EDGES,
+        DISTRIBUTION_BINS,
+        get_costs,
+        get_speed_declines,
+        get_mode,
+        get_smallest,
+        get_largest,
+        EdgeBehavior,
+        get_bin_edges,
+        get_distribution,
+        BehaviorSummary,
+    )
+    from .criticality import (
+        SLOWDOWN,
+        TOP_CANDIDATES,
+        get_assignment,
+        get_edge_users,
+        get_parallel_costs,
+        get_edge_deltas,
+        calculate_edge_criticality,
+    )
+    from .elongation import (
+        get_frac_list,
+        get_k_upper_limit,
+        get_elong_edges,
+    )
+    from .experiments import (
+        TOLERANCE,
+        PRECISION,
+        GRID_CELLS,
+        calculate_first_k,
+        calculate_all_ks,
+        save_first_k_state,
+        count_remaining_ks,
+        load_state,
+        calculate_breakpoints,
+        get_k_grid,
+        evaluate_medians,
+    )
+    from .graph_alg import (
+        read_edges,
+        read_vertices,
+        create_adjacency_matrix,
+        create_dist_matrix,
+        create_dist_pred_matrices,
+        contract_junctions,
+        expand_dist_matrix,
+        get_graph_edges,
+        create_graph_dist_matrix,
+        get_objective,
+    )
+    from .options import (
+        SolverOptions,
+    )
+    from .outputers import (
+        SPEED,
+        output_solution,
+        output_edge_behavior,
+        write_distribution,
+        output_behavior_summary,
+        output_edge_criticality,
+        output_breakpoints,
+    )
+    from .progress import (
+        ProgressEvent,
+        print_progress,
+        Interruption,
+        get_checkpoint_path,
+        save_checkpoint,
+        load_checkpoint,
+        remove_checkpoint,
+    )
+    from .solvers import (
+        P_MEDIAN,
+        P_CENTER,
+        OPTIMAL,
+        FEASIBLE,
+        BOUND_TOLERANCE,
+        LOG_INTERVAL,
+        NEAREST_CANDIDATES,
+        create_lp_variables,
+        add_constraints,
+        add_additional_constraint,
+        set_objective,
+        pulp_solve,
+        create_solver,
+        run_solver,
+        run_solver_in_terminal,
+        pulp_solve_sparse,
+        aggregate_demands,
+        cluster_rows,
+        pulp_solve_aggregated,
+        get_lower_bound,
+        get_status,
+        has_gap,
+        brut_force,
+    )
+
+
+import_times = {}  # Seconds spent importing each library and submodule
+
+
+def _parse(path: str) -> ast.Module:
+    """
+    Parses the source code of a module without importing it.
+
+    Args:
+        path (str): The path of the source file.
+
+    Returns:
+        ast.Module: The syntax tree of the module.
+    """
+    with open(path, "r") as f:
+        return ast.parse(f.read())
+
+
+def _read_attributes() -> dict[str, str]:
+    """
+    Reads the attributes of the package from its TYPE_CHECKING block.
+
+    Returns:
+        dict[str, str]: The submodule defining each attribute.
+    """
+    block = next(
+        node
+        for node in _parse(__file__).body
+        if isinstance(node, ast.If)
+        and isinstance(node.test, ast.Name)
+        and node.test.id == "TYPE_CHECKING"
+    )
+    return {
+        alias.name: node.module
+        for node in block.body
+        if isinstance(node, ast.ImportFrom)
+        for alias in node.names
+    }
+
+
+def _get_libraries(module_name: str) -> list[str]:
+    """
+    Finds the libraries a submodule imports at its top level, so they can be
+    timed separately from it. The standard library isn't included.
+
+    Args:
+        module_name (str): The name of the submodule.
+
+    Returns:
+        list[str]: Full names of the imported libraries.
+    """
+    spec = importlib.util.find_spec(f"{__name__}.{module_name}")
+
+    libraries = []
+    for node in _parse(spec.origin).body:
+        if isinstance(node, ast.Import):
+            libraries += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0:
+            libraries.append(node.module)
+
+    return [
+        library
+        for library in libraries
+        if library.split(".")[0] not in (*sys.stdlib_module_names, __name__)
+    ]
+
+
+def _timed_import(name: str):
+    """
+    Imports the module and records the time spent, unless it was imported
+    already.
+
+    Args:
+        name (str): The full name of the module.
+    """
+    if name not in import_times and name not in sys.modules:
+        start = time.perf_counter()
+        importlib.import_module(name)
+        import_times[name] = time.perf_counter() - start
+
+
+_ATTRIBUTES = _read_attributes()
+
+
+def __getattr__(name: str):
+    """
+    Imports the submodule defining the attribute and returns the attribute.
+
+    Args:
+        name (str): The name of the attribute.
+
+    Raises:
+        AttributeError: If no submodule defines the attribute.
+    """
+    if name not in _ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    module_name = _ATTRIBUTES[name]
+    if f"{__name__}.{module_name}" not in sys.modules:
+        for library in _get_libraries(module_name):
+            _timed_import(library)
+        _timed_import(f"{__name__}.{module_name}")
+
+    value = getattr(globals()[module_name], name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(list(globals()) + list(_ATTRIBUTES))
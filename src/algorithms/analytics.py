@@ -0,0 +1,259 @@
+import numpy as np
+
+import algorithms as alg
+import graph as gh
+
+TOP_EDGES = 10
+DISTRIBUTION_BINS = 11  # Speed declines from 0 to SPEED in 10 km/h bins
+
+
+def get_costs(edges: list[gh.Edge]) -> np.ndarray:
+    """
+    Collects the costs of the edges into an array.
+
+    Args:
+        edges (list[gh.Edge]): The edges.
+
+    Returns:
+        np.ndarray: Cost of each edge.
+    """
+    return np.fromiter((e.cost for e in edges), float, len(edges))
+
+
+def get_speed_declines(cost_ratios: np.ndarray) -> np.ndarray:
+    """
+    Converts the cost ratios of the edges to speed declines.
+
+    Args:
+        cost_ratios (np.ndarray): Original to elongated cost of each edge.
+
+    Returns:
+        np.ndarray: Speed decline of each edge in km/h.
+    """
+    return alg.SPEED - (cost_ratios * alg.SPEED)
+
+
+def get_mode(values: np.ndarray) -> float:
+    """
+    Finds the most frequent value, on ties the one that occurs first.
+
+    Args:
+        values (np.ndarray): The values.
+
+    Returns:
+        float: The most frequent value.
+    """
+    _, first, counts = np.unique(values, return_index=True, return_counts=True)
+    return float(values[first[counts == counts.max()].min()])
+
+
+def get_smallest(values: np.ndarray, n: int) -> np.ndarray:
+    """
+    Selects the indices of the n smallest values without sorting all of them.
+
+    Equal values are taken in the order of their indices, so the result is
+    the same as the first n indices of a stable sort.
+
+    Args:
+        values (np.ndarray): The values.
+        n (int): Number of selected indices.
+
+    Returns:
+        np.ndarray: Indices of the n smallest values in ascending order.
+    """
+    n = min(n, len(values))
+    if n == 0:
+        return np.array([], dtype=int)
+
+    threshold = values[np.argpartition(values, n - 1)[n - 1]]
+    smaller = np.flatnonzero(values < threshold)
+    ties = np.flatnonzero(values == threshold)[: n - len(smaller)]
+    selected = np.concatenate((smaller, ties))
+    return selected[np.lexsort((selected, values[selected]))]
+
+
+def get_largest(values: np.ndarray, n: int) -> np.ndarray:
+    """
+    Selects the indices of the n largest values without sorting all of them.
+
+    The result is the same as the last n indices of a stable sort.
+
+    Args:
+        values (np.ndarray): The values.
+        n (int): Number of selected indices.
+
+    Returns:
+        np.ndarray: Indices of the n largest values in ascending order.
+    """
+    selected = len(values) - 1 - get_smallest(-values[::-1], n)
+    return selected[::-1]
+
+
+class EdgeBehavior:
+    """
+    Represents the elongation of all edges at one change point of the
+    solution, stored as arrays with one item per edge.
+    """
+
+    def __init__(
+        self,
+        original_edges: list[gh.Edge],
+        elongated_edges: list[gh.Edge],
+        medians: list[int],
+    ):
+        """
+        Initializes an EdgeBehavior instance.
+
+        Args:
+            original_edges (list[gh.Edge]): The original edges.
+            elongated_edges (list[gh.Edge]): The elongated edges.
+            medians (list[int]): List of the p-median vertex labels.
+        """
+        self.original_edges = original_edges
+        self.elongated_edges = elongated_edges
+        self.medians = medians
+        self.v1 = np.fromiter((e.v1 for e in original_edges), int)
+        self.v2 = np.fromiter((e.v2 for e in original_edges), int)
+        self.cost_ratios = get_costs(original_edges) / get_costs(
+            elongated_edges
+        )
+        self.declines = get_speed_declines(self.cost_ratios)
+
+    def get_smallest_declines(self, n: int = TOP_EDGES) -> np.ndarray:
+        """
+        Returns the indices of the edges with the smallest speed declines.
+
+        Args:
+            n (int, optional): Number of edges. Default is TOP_EDGES.
+
+        Returns:
+            np.ndarray: Edge indices, from the smallest decline.
+        """
+        return get_smallest(-self.cost_ratios, n)
+
+    def get_biggest_declines(self, n: int = TOP_EDGES) -> np.ndarray:
+        """
+        Returns the indices of the edges with the biggest speed declines.
+
+        Args:
+            n (int, optional): Number of edges. Default is TOP_EDGES.
+
+        Returns:
+            np.ndarray: Edge indices, ending with the biggest decline.
+        """
+        return get_largest(-self.cost_ratios, n)
+
+    def get_incident_edges(self) -> np.ndarray:
+        """
+        Returns the indices of the edges incident to the p-medians.
+
+        Returns:
+            np.ndarray: Edge indices, from the smallest decline.
+        """
+        size = max(self.v1.max(initial=0), self.v2.max(initial=0))
+        is_median = np.zeros(max(size, *self.medians, 0) + 1, dtype=bool)
+        is_median[self.medians] = True
+
+        incident = np.flatnonzero(is_median[self.v1] | is_median[self.v2])
+        return incident[np.lexsort((incident, -self.cost_ratios[incident]))]
+
+    def get_distribution(self) -> np.ndarray:
+        """
+        Counts the edges in each speed decline bin.
+
+        Returns:
+            np.ndarray: Number of edges in each of the DISTRIBUTION_BINS bins.
+        """
+        return get_distribution(self.declines)
+
+
+def get_bin_edges() -> np.ndarray:
+    """
+    Returns the bounds of the speed decline bins.
+
+    Returns:
+        np.ndarray: DISTRIBUTION_BINS + 1 bounds from 0 to SPEED.
+    """
+    return np.linspace(0, alg.SPEED, DISTRIBUTION_BINS + 1)
+
+
+def get_distribution(declines: np.ndarray) -> np.ndarray:
+    """
+    Counts the speed declines in each bin.
+
+    Args:
+        declines (np.ndarray): Speed decline of each edge.
+
+    Returns:
+        np.ndarray: Number of declines in each of the DISTRIBUTION_BINS bins.
+    """
+    counts, _ = np.histogram(
+        np.clip(declines, 0, alg.SPEED), bins=get_bin_edges()
+    )
+    return counts
+
+
+class BehaviorSummary:
+    """
+    Accumulates the speed decline statistics of the change points of several
+    experiments, e.g. all values of k and p of a batch.
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty BehaviorSummary instance.
+        """
+        self.experiments = {}
+
+    def add(
+        self,
+        region: str,
+        p: int,
+        experiment: str,
+        k: float,
+        behavior: EdgeBehavior,
+    ):
+        """
+        Adds the statistics of one change point.
+
+        Args:
+            region (str): The region of the experiment.
+            p (int): Number of weighted p medians.
+            experiment (str): The experiment that found the change point.
+            k (float): The value of k of the change point.
+            behavior (EdgeBehavior): The elongation of the edges.
+        """
+        stats = self.experiments.setdefault(
+            (region, p, experiment),
+            {
+                "ks": [],
+                "minimum": float("inf"),
+                "maximum": float("-inf"),
+                "total": 0.0,
+                "count": 0,
+                "distribution": np.zeros(DISTRIBUTION_BINS, dtype=int),
+            },
+        )
+        stats["ks"].append(k)
+        stats["minimum"] = min(stats["minimum"], behavior.declines.min())
+        stats["maximum"] = max(stats["maximum"], behavior.declines.max())
+        stats["total"] += behavior.declines.sum()
+        stats["count"] += len(behavior.declines)
+        stats["distribution"] += behavior.get_distribution()
+
+    def get_total(self) -> dict:
+        """
+        Merges the statistics of all experiments.
+
+        Returns:
+            dict: Statistics of all change points.
+        """
+        stats = list(self.experiments.values())
+        return {
+            "ks": [k for s in stats for k in s["ks"]],
+            "minimum": min(s["minimum"] for s in stats),
+            "maximum": max(s["maximum"] for s in stats),
+            "total": sum(s["total"] for s in stats),
+            "count": sum(s["count"] for s in stats),
+            "distribution": sum(s["distribution"] for s in stats),
+        }
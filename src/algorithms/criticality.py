@@ -0,0 +1,308 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+import algorithms as alg
+import graph as gh
+
+SLOWDOWN = 2.0  # Factor by which the cost of a tested edge is multiplied
+TOP_CANDIDATES = 10
+
+_worker_state = {}
+
+
+def get_assignment(dist_matrix: np.ndarray, medians: list[int]) -> np.ndarray:
+    """
+    Assigns every vertex to its nearest median.
+
+    Args:
+        dist_matrix (np.ndarray): Distance matrix of the graph.
+        medians (list[int]): List of the p-median vertex labels.
+
+    Returns:
+        np.ndarray: Label of the nearest median for each vertex.
+    """
+    medians_array = np.asarray(medians)
+    return medians_array[np.argmin(dist_matrix[:, medians_array], axis=1)]
+
+
+def get_edge_users(
+    pred_matrix: np.ndarray,
+    assignment: np.ndarray,
+    edges: list[gh.Edge],
+    vertices: list[gh.Vertex],
+) -> dict[int, list[int]]:
+    """
+    Finds the demand vertices whose shortest path to their assigned median
+    uses each edge.
+
+    Only vertices with a positive weight are considered, since the others do
+    not contribute to the objective. Of parallel edges only the cheapest one
+    can be used.
+
+    Args:
+        pred_matrix (np.ndarray): Shortest path predecessor matrix.
+        assignment (np.ndarray): Label of the assigned median for each vertex.
+        edges (list[gh.Edge]): The edges of the graph.
+        vertices (list[gh.Vertex]): List of vertex objects with weights.
+
+    Returns:
+        dict[int, list[int]]: Demand vertex labels keyed by edge index.
+    """
+    edge_index = {}
+    for i, e in enumerate(edges):
+        key = (min(e.v1, e.v2), max(e.v1, e.v2))
+        if key not in edge_index or e.cost < edges[edge_index[key]].cost:
+            edge_index[key] = i
+
+    edge_users = {}
+    for v in vertices:
+        if v.weight <= 0:
+            continue
+
+        current = int(assignment[v.label])
+        while current != v.label:
+            previous = int(pred_matrix[v.label, current])
+            if previous < 0:
+                break
+            i = edge_index[(min(previous, current), max(previous, current))]
+            edge_users.setdefault(i, []).append(v.label)
+            current = previous
+
+    return edge_users
+
+
+def get_parallel_costs(edges: list[gh.Edge]) -> list[float]:
+    """
+    Finds the cheapest parallel edge of every edge.
+
+    Args:
+        edges (list[gh.Edge]): The edges of the graph.
+
+    Returns:
+        list[float]: The cost of the cheapest other edge with the same ends,
+        infinity if there is none.
+    """
+    by_ends = {}
+    for i, e in enumerate(edges):
+        by_ends.setdefault((min(e.v1, e.v2), max(e.v1, e.v2)), []).append(i)
+
+    parallel_costs = []
+    for i, e in enumerate(edges):
+        parallel = by_ends[(min(e.v1, e.v2), max(e.v1, e.v2))]
+        parallel_costs.append(
+            min((edges[j].cost for j in parallel if j != i), default=np.inf)
+        )
+    return parallel_costs
+
+
+def _init_worker(
+    adjacency: csr_matrix,
+    edges: list[gh.Edge],
+    graph_edges: list[gh.Edge],
+    parallel_costs: list[float],
+    medians: list[int],
+    weights: np.ndarray,
+    base_costs: np.ndarray,
+    slowdown: float,
+):
+    """
+    Stores the data shared by all edge evaluations in a worker process.
+    """
+    _worker_state["adjacency"] = adjacency
+    _worker_state["edges"] = edges
+    _worker_state["graph_edges"] = graph_edges
+    _worker_state["parallel_costs"] = parallel_costs
+    _worker_state["medians"] = np.asarray(medians)
+    _worker_state["weights"] = weights
+    _worker_state["base_costs"] = base_costs
+    _worker_state["slowdown"] = slowdown
+
+
+def _get_edge_delta(task: tuple[int, int, list[int]]) -> tuple[int, float]:
+    """
+    Computes the change of the fixed-medians objective when one edge is
+    slowed down.
+
+    Distances are recomputed only from the demand vertices whose assigned
+    shortest path uses the edge, all other assignments stay unchanged.
+
+    Args:
+        task (tuple[int, int, list[int]]): Original edge index, index of the
+        graph edge containing it and the affected demands.
+
+    Returns:
+        tuple[int, float]: Original edge index and the objective delta.
+    """
+    edge_idx, graph_edge_idx, demands = task
+    e = _worker_state["edges"][edge_idx]
+    graph_edge = _worker_state["graph_edges"][graph_edge_idx]
+
+    adjacency = _worker_state["adjacency"].copy()
+    new_cost = min(
+        graph_edge.cost + e.cost * (_worker_state["slowdown"] - 1),
+        _worker_state["parallel_costs"][graph_edge_idx],
+    )
+    adjacency[graph_edge.v1, graph_edge.v2] = new_cost
+    adjacency[graph_edge.v2, graph_edge.v1] = new_cost
+
+    dist_rows = dijkstra(csgraph=adjacency, directed=False, indices=demands)
+    new_costs = dist_rows[:, _worker_state["medians"]].min(axis=1)
+
+    weights = _worker_state["weights"][demands]
+    old_costs = _worker_state["base_costs"][demands]
+    delta = float(np.sum(weights * (new_costs - old_costs)))
+
+    return edge_idx, delta
+
+
+def get_edge_deltas(
+    graph: gh.Graph,
+    medians: list[int],
+    slowdown: float = SLOWDOWN,
+    workers: int | None = None,
+) -> list[float]:
+    """
+    Computes the fixed-medians objective delta for every edge of the graph.
+
+    Edges that are not used by any demand-median shortest path have a delta
+    of zero and are not evaluated at all. The remaining edges are evaluated
+    in parallel. If the graph is reduced, an original edge is slowed down by
+    elongating the composite edge containing it.
+
+    Args:
+        graph (gh.Graph): The graph object containing vertices, edges, and the
+        distance matrix.
+        medians (list[int]): List of the p-median vertex labels.
+        slowdown (float, optional): Factor applied to the cost of the tested
+        edge.
+        workers (int | None, optional): Number of worker processes. Defaults to
+        the number of CPUs.
+
+    Returns:
+        list[float]: Objective delta for each original edge in the graph.
+    """
+    graph_edges = alg.get_graph_edges(graph, graph.edges)
+    if graph.reduction is None:
+        edge_index = list(range(len(graph.edges)))
+    else:
+        edge_index = graph.reduction.get_edge_index()
+
+    dist_matrix, pred_matrix = alg.create_dist_pred_matrices(
+        graph_edges, graph.num_of_verts
+    )
+    assignment = get_assignment(dist_matrix, medians)
+    edge_users = get_edge_users(
+        pred_matrix, assignment, graph_edges, graph.vertices
+    )
+
+    weights = np.array([v.weight for v in graph.vertices])
+    base_costs = dist_matrix[np.arange(graph.num_of_verts), assignment]
+    adjacency = alg.create_adjacency_matrix(graph_edges, graph.num_of_verts)
+
+    tasks = [
+        (i, edge_index[i], edge_users[edge_index[i]])
+        for i in range(len(graph.edges))
+        if edge_index[i] in edge_users
+    ]
+
+    deltas = [0.0 for _ in graph.edges]
+    with ProcessPoolExecutor(
+        max_workers=workers or os.cpu_count(),
+        initializer=_init_worker,
+        initargs=(
+            adjacency,
+            graph.edges,
+            graph_edges,
+            get_parallel_costs(graph_edges),
+            medians,
+            weights,
+            base_costs,
+            slowdown,
+        ),
+    ) as executor:
+        for edge_idx, delta in executor.map(
+            _get_edge_delta, tasks, chunksize=16
+        ):
+            deltas[edge_idx] = delta
+
+    return deltas
+
+
+def calculate_edge_criticality(
+    graph: gh.Graph,
+    p: int,
+    slowdown: float = SLOWDOWN,
+    top_n: int = TOP_CANDIDATES,
+    workers: int | None = None,
+    options: alg.SolverOptions | None = None,
+):
+    """
+    Ranks the edges by how much slowing each of them down damages the service
+    of the current optimal p-medians.
+
+    The edges are ranked by the fixed-medians objective delta, after which
+    the p-median problem is solved exactly again only for the top candidates
+    to find out whether the slowdown also changes the optimal solution.
+
+    Args:
+        graph (gh.Graph): The graph object containing vertices, edges, and the
+        distance matrix.
+        p (int): Number of weighted p medians.
+        slowdown (float, optional): Factor applied to the cost of the tested
+        edge.
+        top_n (int, optional): Number of top ranked edges to solve exactly.
+        workers (int | None, optional): Number of worker processes used for
+        the edge evaluation.
+        options (alg.SolverOptions | None, optional): Settings of the solver.
+    """
+    file = f"{graph.region}-{p}-edge-criticality"
+
+    print("Solving for original graph")
+    medians, objective, status, _ = alg.pulp_solve(
+        graph.dist_matrix,
+        graph.vertices,
+        p,
+        alg.P_MEDIAN,
+        graph.city_bound,
+        options,
+    )
+    if status != alg.OPTIMAL:
+        raise ValueError("Original problem was not solved to optimality.")
+
+    deltas = get_edge_deltas(graph, medians, slowdown, workers)
+    ranking = sorted(
+        range(len(graph.edges)), key=lambda i: deltas[i], reverse=True
+    )
+
+    resolved = []
+    for i in ranking[:top_n]:
+        slowed_edges = list(graph.edges)
+        e = graph.edges[i]
+        slowed_edges[i] = gh.Edge(e.v1, e.v2, e.cost * slowdown)
+
+        slowed_dist_matrix = alg.create_graph_dist_matrix(graph, slowed_edges)
+
+        print(f"Solving for slowed edge: {e}")
+        new_medians, new_objective, new_status, _ = alg.pulp_solve(
+            slowed_dist_matrix,
+            graph.vertices,
+            p,
+            alg.P_MEDIAN,
+            graph.city_bound,
+            options,
+        )
+        resolved.append((i, new_medians, new_objective, new_status))
+
+    alg.output_edge_criticality(
+        graph.edges,
+        deltas,
+        resolved,
+        medians,
+        objective,
+        slowdown,
+        file,
+    )
@@ -1,5 +1,6 @@
 import numpy as np
 
+import algorithms as alg
 import graph as gh
 
 
@@ -17,13 +18,19 @@ def get_frac_list(graph: gh.Graph) -> list[float]:
     Returns:
         list[float]: A list of fraction values, one for each edge in the graph.
     """
+    dist_matrix = graph.dist_matrix
+    if graph.reduction is not None:
+        dist_matrix = alg.expand_dist_matrix(
+            graph.reduction, graph.edges, graph.dist_matrix
+        )
+
     frac_list = []
     for e in graph.edges:
         frac_sum = 0.0
 
         for v in graph.vertices:
-            d_v1 = graph.dist_matrix[e.v1][v.label]
-            d_v2 = graph.dist_matrix[e.v2][v.label]
+            d_v1 = dist_matrix[e.v1][v.label]
+            d_v2 = dist_matrix[e.v2][v.label]
             d_e_v = min(d_v1, d_v2) + (e.cost / 2)
             frac = v.weight / d_e_v
             frac_sum += frac
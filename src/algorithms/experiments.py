@@ -1,10 +1,18 @@
 import math
+import os
+import statistics
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 
 import algorithms as alg
 import graph as gh
 
 TOLERANCE = 0.001
 PRECISION = 0.1
+GRID_CELLS = 16
 
 
 def calculate_first_k(
@@ -13,6 +21,10 @@ def calculate_first_k(
     denominator: float,
     k_upper_limit: float,
     p: int,
+    options: alg.SolverOptions | None = None,
+    on_progress: Callable[[alg.ProgressEvent], None] | None = None,
+    resume: bool = False,
+    summary: alg.BehaviorSummary | None = None,
 ):
     """
     Calculates the first significant value of k where the p-median solution
@@ -22,6 +34,9 @@ def calculate_first_k(
     that results in a different solution to the p-median problem when edge
     lengths are elongated by a factor based on k.
 
+    The state of the search is saved to a checkpoint after every solved k,
+    so an interrupted (SIGINT) or killed run can be resumed.
+
     Args:
         graph (gh.Graph): The graph object containing vertices, edges, and the
         distance matrix.
@@ -31,66 +46,160 @@ def calculate_first_k(
         elongation.
         k_upper_limit (float): The maximum value to test for k.
         p (int): Number of weighted p medians.
-    """
-    k = 0
-    step = k_upper_limit / 2
-    print(f"Solving for k: {k:.4f}")
-    previous_medians, previous_objective = alg.pulp_solve(
-        graph.dist_matrix, graph.vertices, p, alg.P_MEDIAN, graph.city_bound
-    )
-    elong_edges = []
-    medians = []
-    objective = 0.0
-    cost_ratios = [1.0 for _ in graph.edges]
-
-    alg.output_solution(
-        k,
-        k_upper_limit,
-        cost_ratios,
-        previous_medians,
-        previous_objective,
-        f"{graph.region}-{p}-calculate-first-k",
-    )
+        options (alg.SolverOptions | None, optional): Settings of the solver.
+        on_progress (Callable[[alg.ProgressEvent], None] | None, optional):
+        Called after every solved k.
+        resume (bool, optional): If True, the search continues from the saved
+        checkpoint.
+        summary (alg.BehaviorSummary | None, optional): Collects the speed
+        declines of the found change point, if the solution changed.
 
-    while step >= PRECISION and k + step <= k_upper_limit:
-        k += step
+    Raises:
+        KeyboardInterrupt: If the search was interrupted, after its checkpoint
+        was saved.
+    """
+    file = f"{graph.region}-{p}-calculate-first-k"
+    state = load_state(file, k_upper_limit) if resume else None
 
-        elong_edges = alg.get_elong_edges(
-            graph.edges, frac_list, (k / denominator)
+    if state is None:
+        k = 0
+        step = k_upper_limit / 2
+        print(f"Solving for k: {k:.4f}")
+        start = time.perf_counter()
+        previous_medians, previous_objective, status, bound = alg.pulp_solve(
+            graph.dist_matrix,
+            graph.vertices,
+            p,
+            alg.P_MEDIAN,
+            graph.city_bound,
+            options,
         )
+        cost_ratios = np.ones(len(graph.edges))
 
-        elong_dist_matrix = alg.create_dist_matrix(
-            elong_edges, graph.num_of_verts
+        alg.output_solution(
+            k,
+            k_upper_limit,
+            cost_ratios,
+            previous_medians,
+            previous_objective,
+            file,
+            status,
+            bound,
         )
 
-        print(f"Solving for k: {k:.4f}")
-        medians, objective = alg.pulp_solve(
-            elong_dist_matrix, graph.vertices, p, alg.P_MEDIAN, graph.city_bound
+        if status != alg.OPTIMAL:
+            print(
+                f"Solution for k: {k:.4f} is not optimal, nothing to compare."
+            )
+            return
+
+        solve_times = [time.perf_counter() - start]
+        last_k = None
+        medians = []
+        objective = 0.0
+        save_first_k_state(
+            file,
+            k_upper_limit,
+            k,
+            step,
+            previous_medians,
+            solve_times,
+            last_k,
+            [medians, objective, status, bound],
         )
+    else:
+        k = state["k"]
+        step = state["step"]
+        previous_medians = state["previous_medians"]
+        solve_times = state["solve_times"]
+        last_k = state["last_k"]
+        medians, objective, status, bound = state["last_solution"]
 
-        if medians != previous_medians:
-            k -= step
-            step /= 2
+    with alg.Interruption() as interruption:
+        while step >= PRECISION and k + step <= k_upper_limit:
+            k += step
+            start = time.perf_counter()
+
+            elong_edges = alg.get_elong_edges(
+                graph.edges, frac_list, (k / denominator)
+            )
 
-    cost_ratios = [
-        graph.edges[i].cost / elong_edges[i].cost
-        for i in range(len(elong_edges))
-    ]
+            elong_dist_matrix = alg.create_graph_dist_matrix(graph, elong_edges)
+
+            print(f"Solving for k: {k:.4f}")
+            solution = alg.pulp_solve(
+                elong_dist_matrix,
+                graph.vertices,
+                p,
+                alg.P_MEDIAN,
+                graph.city_bound,
+                options,
+            )
+            # The solver is interrupted as well, only a solution it still
+            # proved optimal is kept.
+            if interruption.requested and solution[2] != alg.OPTIMAL:
+                print(f"Progress saved to {alg.get_checkpoint_path(file)}")
+                raise KeyboardInterrupt
+
+            medians, objective, status, bound = solution
+            last_k = k
+            solve_times.append(time.perf_counter() - start)
+
+            # A non-optimal solution can't confirm that the medians stayed the
+            # same, so it is treated as a change and the search stays below it.
+            if status != alg.OPTIMAL or medians != previous_medians:
+                k -= step
+                step /= 2
+
+            save_first_k_state(
+                file,
+                k_upper_limit,
+                k,
+                step,
+                previous_medians,
+                solve_times,
+                last_k,
+                [medians, objective, status, bound],
+            )
+
+            if on_progress is not None:
+                # Every halving of the step takes at least one more solve.
+                remaining = max(0, math.ceil(math.log2(step / PRECISION)))
+                on_progress(
+                    alg.ProgressEvent(
+                        last_k,
+                        medians,
+                        objective,
+                        status,
+                        solve_times[-1],
+                        remaining * statistics.mean(solve_times),
+                    )
+                )
+
+            if interruption.requested:
+                print(f"Progress saved to {alg.get_checkpoint_path(file)}")
+                raise KeyboardInterrupt
+
+    elong_edges = alg.get_elong_edges(
+        graph.edges, frac_list, ((last_k or 0) / denominator)
+    )
+    behavior = alg.EdgeBehavior(graph.edges, elong_edges, medians)
 
     alg.output_solution(
         k,
         k_upper_limit,
-        cost_ratios,
+        behavior.cost_ratios,
         medians,
         objective,
-        f"{graph.region}-{p}-calculate-first-k",
-    )
-    alg.output_edge_behavior(
-        graph.edges,
-        elong_edges,
-        medians,
-        f"{graph.region}-{p}-calculate-first-k",
+        file,
+        status,
+        bound,
     )
+    alg.output_edge_behavior(behavior, file)
+    # k stays below the upper limit only if a change was found.
+    if summary is not None and k < k_upper_limit:
+        summary.add(graph.region, p, "first-k", k, behavior)
+    alg.remove_checkpoint(file)
 
 
 def calculate_all_ks(
@@ -99,6 +208,10 @@ def calculate_all_ks(
     denominator: float,
     k_upper_limit: float,
     p: int,
+    options: alg.SolverOptions | None = None,
+    on_progress: Callable[[alg.ProgressEvent], None] | None = None,
+    resume: bool = False,
+    summary: alg.BehaviorSummary | None = None,
 ):
     """
     Iteratively calculates values of k and evaluates the p-median problem
@@ -108,6 +221,9 @@ def calculate_all_ks(
     the p-median problem. It also computes and displays statistical data about
     edge cost elongations, such as min, max, mean, and mode of the cost ratios.
 
+    The state of the sweep is saved to a checkpoint after every solved k,
+    so an interrupted (SIGINT) or killed run can be resumed.
+
     Args:
         graph (gh.Graph): The graph object containing vertices, edges, and the
         distance matrix.
@@ -117,48 +233,451 @@ def calculate_all_ks(
         elongation.
         k_upper_limit (float): The maximum value to increment k towards.
         p (int): Number of weighted p medians.
+        options (alg.SolverOptions | None, optional): Settings of the solver.
+        on_progress (Callable[[alg.ProgressEvent], None] | None, optional):
+        Called after every solved k.
+        resume (bool, optional): If True, the sweep continues from the saved
+        checkpoint.
+        summary (alg.BehaviorSummary | None, optional): Collects the speed
+        declines of every change of the solution.
+
+    Raises:
+        KeyboardInterrupt: If the sweep was interrupted, after its checkpoint
+        was saved.
     """
-    k = 0
-    step = k_upper_limit
-    previous_medians = []
-    edges_previous = graph.edges
+    file = f"{graph.region}-{p}-calculate-all-ks"
+    state = load_state(file, k_upper_limit) if resume else None
+
+    if state is None:
+        k = 0
+        step = k_upper_limit
+        previous_medians = []
+        edges_previous = graph.edges
+        solve_times = []
+    else:
+        k = state["k"]
+        step = state["step"]
+        previous_medians = state["previous_medians"]
+        edges_previous = [
+            gh.Edge(e.v1, e.v2, cost)
+            for e, cost in zip(graph.edges, state["previous_costs"])
+        ]
+        solve_times = state["solve_times"]
 
+    with alg.Interruption() as interruption:
+        while not math.isclose(k, k_upper_limit, rel_tol=TOLERANCE):
+            start = time.perf_counter()
+
+            elong_edges = alg.get_elong_edges(
+                graph.edges, frac_list, (k / denominator)
+            )
+
+            elong_dist_matrix = alg.create_graph_dist_matrix(graph, elong_edges)
+
+            print(f"Solving for k: {k:.4f}")
+            medians, objective, status, bound = alg.pulp_solve(
+                elong_dist_matrix,
+                graph.vertices,
+                p,
+                alg.P_MEDIAN,
+                graph.city_bound,
+                options,
+            )
+            # The solver is interrupted as well, only a solution it still
+            # proved optimal is kept.
+            if interruption.requested and status != alg.OPTIMAL:
+                print(f"Progress saved to {alg.get_checkpoint_path(file)}")
+                raise KeyboardInterrupt
+
+            behavior = alg.EdgeBehavior(edges_previous, elong_edges, medians)
+
+            if status != alg.OPTIMAL:
+                # A non-optimal solution is recorded but never compared.
+                alg.output_solution(
+                    k,
+                    k_upper_limit,
+                    behavior.cost_ratios,
+                    medians,
+                    objective,
+                    file,
+                    status,
+                    bound,
+                )
+            elif previous_medians != medians:
+                # The first solution, at k = 0, isn't a change.
+                if summary is not None and previous_medians:
+                    summary.add(graph.region, p, "all-ks", k, behavior)
+                previous_medians = medians
+
+                alg.output_solution(
+                    k,
+                    k_upper_limit,
+                    behavior.cost_ratios,
+                    medians,
+                    objective,
+                    file,
+                    status,
+                    bound,
+                )
+                alg.output_edge_behavior(behavior, file)
+
+            solved_k = k
+            solve_times.append(time.perf_counter() - start)
+
+            step /= 2
+            k += step
+            edges_previous = elong_edges
+
+            alg.save_checkpoint(
+                file,
+                {
+                    "k_upper_limit": k_upper_limit,
+                    "k": k,
+                    "step": step,
+                    "previous_medians": previous_medians,
+                    "previous_costs": [e.cost for e in edges_previous],
+                    "solve_times": solve_times,
+                },
+            )
+
+            if on_progress is not None:
+                remaining = count_remaining_ks(k, step, k_upper_limit)
+                on_progress(
+                    alg.ProgressEvent(
+                        solved_k,
+                        medians,
+                        objective,
+                        status,
+                        solve_times[-1],
+                        remaining * statistics.mean(solve_times),
+                    )
+                )
+
+            if interruption.requested:
+                print(f"Progress saved to {alg.get_checkpoint_path(file)}")
+                raise KeyboardInterrupt
+
+    alg.remove_checkpoint(file)
+
+
+def save_first_k_state(
+    file: str,
+    k_upper_limit: float,
+    k: float,
+    step: float,
+    previous_medians: list[int],
+    solve_times: list[float],
+    last_k: float | None,
+    last_solution: list,
+):
+    """
+    Saves the state of calculate_first_k to its checkpoint.
+
+    Args:
+        file (str): The name of the output file.
+        k_upper_limit (float): The maximum value to test for k.
+        k (float): The largest k with unchanged solution.
+        step (float): The current step of k.
+        previous_medians (list[int]): The p-medians for k = 0.
+        solve_times (list[float]): Time spent on every solved k in seconds.
+        last_k (float | None): The last solved value of k.
+        last_solution (list): P-medians, objective value, solution status and
+        bound of the last solved k.
+    """
+    alg.save_checkpoint(
+        file,
+        {
+            "k_upper_limit": k_upper_limit,
+            "k": k,
+            "step": step,
+            "previous_medians": previous_medians,
+            "solve_times": solve_times,
+            "last_k": last_k,
+            "last_solution": last_solution,
+        },
+    )
+
+
+def count_remaining_ks(k: float, step: float, k_upper_limit: float) -> int:
+    """
+    Counts the values of k that calculate_all_ks still has to solve.
+
+    Args:
+        k (float): The next value of k.
+        step (float): The current step of k.
+        k_upper_limit (float): The maximum value to increment k towards.
+
+    Returns:
+        int: The number of remaining values of k.
+    """
+    remaining = 0
     while not math.isclose(k, k_upper_limit, rel_tol=TOLERANCE):
+        remaining += 1
+        step /= 2
+        k += step
+    return remaining
+
+
+def load_state(file: str, k_upper_limit: float) -> dict | None:
+    """
+    Loads the checkpoint of a sweep and checks that it belongs to the same
+    experiment.
+
+    Args:
+        file (str): The name of the output file.
+        k_upper_limit (float): The maximum value of k of the experiment.
+
+    Returns:
+        dict | None: The state of the sweep, None if there is no checkpoint.
+
+    Raises:
+        ValueError: If the checkpoint was created for a different upper limit.
+    """
+    state = alg.load_checkpoint(file)
+    if state is None:
+        print("No checkpoint found, starting from k: 0.")
+        return None
+    if not math.isclose(state["k_upper_limit"], k_upper_limit):
+        raise ValueError(
+            f"Checkpoint {alg.get_checkpoint_path(file)} belongs to "
+            "a different experiment."
+        )
+    if "k" in state:
+        print(f"Resuming from k: {state['k']:.4f}")
+    else:
+        print(f"Resuming with {len(state['solutions'])} solved values of k")
+    return state
+
+
+def calculate_breakpoints(
+    graph: gh.Graph,
+    frac_list: list[float],
+    denominator: float,
+    k_upper_limit: float,
+    p: int,
+    options: alg.SolverOptions | None = None,
+    on_progress: Callable[[alg.ProgressEvent], None] | None = None,
+    resume: bool = False,
+    workers: int | None = None,
+):
+    """
+    Finds the values of k at which the p-median solution changes.
+
+    The solutions are first computed on a grid of k (see get_k_grid). Every
+    grid cell whose endpoint solutions differ is then bisected recursively,
+    only the halves whose endpoint solutions differ are split further, until
+    they are shorter than PRECISION. Every k is solved only once and all
+    values of k of one round are solved concurrently.
+
+    Changes are found only where the solutions at the ends of a grid cell
+    differ. If the solution changes and changes back inside one cell, both
+    changes are missed.
+
+    An interval with an endpoint not solved to optimality (time limit or
+    MIP gap) isn't split, as a different solution there doesn't prove a
+    change. If its solutions differ, it is reported as an unproven change
+    instead of a breakpoint.
+
+    The solutions are saved to a checkpoint after every solved k, so an
+    interrupted (SIGINT) or killed run can be resumed.
+
+    Args:
+        graph (gh.Graph): The graph object containing vertices, edges, and the
+        distance matrix.
+        frac_list (list[float]): A list of fraction values used to scale edge
+        costs.
+        denominator (float): The scaling denominator applied to k for edge
+        elongation.
+        k_upper_limit (float): The maximum value to test for k.
+        p (int): Number of weighted p medians.
+        options (alg.SolverOptions | None, optional): Settings of the solver.
+        on_progress (Callable[[alg.ProgressEvent], None] | None, optional):
+        Called after every solved k.
+        resume (bool, optional): If True, the search continues from the saved
+        checkpoint.
+        workers (int | None, optional): Number of concurrent solves. Defaults
+        to the number of CPUs.
+
+    Raises:
+        KeyboardInterrupt: If the search was interrupted, after its checkpoint
+        was saved.
+    """
+    file = f"{graph.region}-{p}-calculate-breakpoints"
+    state = load_state(file, k_upper_limit) if resume else None
+
+    if state is None:
+        ks = get_k_grid(k_upper_limit)
+        intervals = list(zip(ks, ks[1:]))
+        solutions = {}
+    else:
+        ks = state["ks"]
+        intervals = [tuple(interval) for interval in state["intervals"]]
+        solutions = {k: solution for k, *solution in state["solutions"]}
+
+    interruption = alg.Interruption()
+
+    def solve(k: float) -> tuple[tuple | None, float]:
+        # Values of k queued before an interruption aren't started.
+        if interruption.requested:
+            return None, 0.0
+
+        start = time.perf_counter()
         elong_edges = alg.get_elong_edges(
             graph.edges, frac_list, (k / denominator)
         )
 
-        elong_dist_matrix = alg.create_dist_matrix(
-            elong_edges, graph.num_of_verts
-        )
+        elong_dist_matrix = alg.create_graph_dist_matrix(graph, elong_edges)
 
         print(f"Solving for k: {k:.4f}")
-        medians, objective = alg.pulp_solve(
-            elong_dist_matrix, graph.vertices, p, alg.P_MEDIAN, graph.city_bound
+        solution = alg.pulp_solve(
+            elong_dist_matrix,
+            graph.vertices,
+            p,
+            alg.P_MEDIAN,
+            graph.city_bound,
+            options,
+        )
+        return solution, time.perf_counter() - start
+
+    def is_same(k1: float, k2: float) -> bool:
+        return solutions[k1][0] == solutions[k2][0]
+
+    def is_proven(k1: float, k2: float) -> bool:
+        return (
+            solutions[k1][2] == alg.OPTIMAL and solutions[k2][2] == alg.OPTIMAL
         )
 
-        if previous_medians != medians:
-            previous_medians = medians
-            cost_ratios = [
-                edges_previous[i].cost / elong_edges[i].cost
-                for i in range(len(elong_edges))
+    def save_state():
+        alg.save_checkpoint(
+            file,
+            {
+                "k_upper_limit": k_upper_limit,
+                "ks": ks,
+                "intervals": intervals,
+                "solutions": [[k, *solutions[k]] for k in solutions],
+            },
+        )
+
+    with (
+        interruption,
+        ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor,
+    ):
+        while ks:
+            pending = [k for k in ks if k not in solutions]
+            futures = [executor.submit(solve, k) for k in pending]
+            for k, future in zip(pending, futures):
+                solution, solve_time = future.result()
+                if solution is None:
+                    continue
+                medians, objective, status, _ = solution
+
+                # The solver is interrupted as well, only a solution it still
+                # proved optimal is kept.
+                if interruption.requested and status != alg.OPTIMAL:
+                    continue
+
+                solutions[k] = solution
+                save_state()
+
+                if on_progress is not None:
+                    # The number of remaining solves isn't known in advance.
+                    on_progress(
+                        alg.ProgressEvent(
+                            k, medians, objective, status, solve_time, None
+                        )
+                    )
+
+            if interruption.requested:
+                print(f"Progress saved to {alg.get_checkpoint_path(file)}")
+                raise KeyboardInterrupt
+
+            to_split = [
+                (lo, hi)
+                for lo, hi in intervals
+                if hi - lo > PRECISION
+                and is_proven(lo, hi)
+                and not is_same(lo, hi)
             ]
+            ks = [(lo + hi) / 2 for lo, hi in to_split]
+            intervals = []
+            for (lo, hi), mid in zip(to_split, ks):
+                intervals += [(lo, mid), (mid, hi)]
+            save_state()
 
-            alg.output_solution(
-                k,
-                k_upper_limit,
-                cost_ratios,
-                medians,
-                objective,
-                f"{graph.region}-{p}-calculate-all-ks",
-            )
-            alg.output_edge_behavior(
-                edges_previous,
-                elong_edges,
-                medians,
-                f"{graph.region}-{p}-calculate-all-ks",
-            )
+    segments = []
+    unproven = []
+    for k in sorted(solutions):
+        medians, objective, status, _ = solutions[k]
+        if segments and is_same(segments[-1][1], k):
+            segments[-1][1] = k
+            segments[-1][4] = objective
+            if status != alg.OPTIMAL:
+                segments[-1][5] = status
+            continue
+
+        if segments and not is_proven(segments[-1][1], k):
+            unproven.append((segments[-1][1], k))
+        segments.append([k, k, medians, objective, objective, status])
+
+    alg.output_breakpoints(
+        segments, unproven, k_upper_limit, len(solutions), file
+    )
+    alg.remove_checkpoint(file)
+
+
+def get_k_grid(k_upper_limit: float, cells: int = GRID_CELLS) -> list[float]:
+    """
+    Creates the initial values of k of calculate_breakpoints.
+
+    The grid joins a uniform grid of the given number of cells with the
+    values of k solved by calculate_all_ks, which get denser towards the
+    upper limit.
 
+    Args:
+        k_upper_limit (float): The maximum value of k.
+        cells (int, optional): Number of cells of the uniform grid. Default is
+        GRID_CELLS.
+
+    Returns:
+        list[float]: Sorted values of k from 0 to k_upper_limit.
+    """
+    ks = {k_upper_limit * i / cells for i in range(cells + 1)}
+
+    k = 0.0
+    step = k_upper_limit
+    while not math.isclose(k, k_upper_limit, rel_tol=TOLERANCE):
+        ks.add(k)
         step /= 2
         k += step
-        edges_previous = elong_edges
+
+    return sorted(ks)
+
+
+def evaluate_medians(
+    graph: gh.Graph,
+    frac_list: list[float],
+    denominator: float,
+    k: float,
+    medians: list[int],
+) -> float:
+    """
+    Evaluates the p-median objective value of fixed medians for one value of
+    k, without solving the problem.
+
+    Args:
+        graph (gh.Graph): The graph object containing vertices, edges, and the
+        distance matrix.
+        frac_list (list[float]): A list of fraction values used to scale edge
+        costs.
+        denominator (float): The scaling denominator applied to k for edge
+        elongation.
+        k (float): The value of k for the elongation.
+        medians (list[int]): List of the p-median vertex labels.
+
+    Returns:
+        float: The objective value of the medians.
+    """
+    elong_edges = alg.get_elong_edges(graph.edges, frac_list, (k / denominator))
+    elong_dist_matrix = alg.create_graph_dist_matrix(graph, elong_edges)
+
+    return alg.get_objective(elong_dist_matrix, graph.vertices, medians)
@@ -69,6 +69,41 @@ def read_vertices(file_path: str) -> tuple[list[gh.Vertex], int]:
     return vertices, city_bound
 
 
+def create_adjacency_matrix(
+    edges: list[gh.Edge], num_of_verts: int
+) -> csr_matrix:
+    """
+    Creates a sparse adjacency matrix for the given edges and vertices.
+
+    Only the edges are stored, of parallel edges only the cheapest one.
+
+    Args:
+        edges (list[gh.Edge]): A list of edges connecting vertices in the graph.
+        num_of_verts (int): The total number of vertices in the graph.
+
+    Returns:
+        csr_matrix: A symmetric sparse matrix holding the edge costs.
+    """
+    costs = {}
+    for e in edges:
+        if e.v1 == e.v2:
+            continue
+        key = (min(e.v1, e.v2), max(e.v1, e.v2))
+        costs[key] = min(costs.get(key, float(np.inf)), e.cost)
+
+    rows = np.fromiter((v1 for v1, _ in costs), int, len(costs))
+    cols = np.fromiter((v2 for _, v2 in costs), int, len(costs))
+    data = np.fromiter(costs.values(), float, len(costs))
+
+    return csr_matrix(
+        (
+            np.concatenate((data, data)),
+            (np.concatenate((rows, cols)), np.concatenate((cols, rows))),
+        ),
+        shape=(num_of_verts, num_of_verts),
+    )
+
+
 def create_dist_matrix(edges: list[gh.Edge], num_of_verts: int) -> np.ndarray:
     """
     Creates a distance matrix for the given edges and vertices using the
@@ -86,15 +121,222 @@ def create_dist_matrix(edges: list[gh.Edge], num_of_verts: int) -> np.ndarray:
     Returns:
         np.ndarray: A 2D array representing the shortest path distance matrix.
     """
-    dist_matrix = np.full((num_of_verts, num_of_verts), float(np.inf))
+    sparse_matrix = create_adjacency_matrix(edges, num_of_verts)
+    dist_matrix = floyd_warshall(csgraph=sparse_matrix, directed=False)
 
-    np.fill_diagonal(dist_matrix, 0)
+    return dist_matrix
 
-    for e in edges:
-        dist_matrix[e.v1, e.v2] = e.cost
-        dist_matrix[e.v2, e.v1] = e.cost
 
-    sparse_matrix = csr_matrix(dist_matrix)
-    dist_matrix = floyd_warshall(csgraph=sparse_matrix, directed=False)
+def create_dist_pred_matrices(
+    edges: list[gh.Edge], num_of_verts: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Creates a distance matrix together with the predecessor matrix of the
+    shortest paths using the Floyd-Warshall algorithm.
 
-    return dist_matrix
+    Element [i, j] of the predecessor matrix is the vertex preceding j on the
+    shortest path from i to j, or -9999 if there is no such path.
+
+    Args:
+        edges (list[gh.Edge]): A list of edges connecting vertices in the graph.
+        num_of_verts (int): The total number of vertices in the graph.
+
+    Returns:
+        tuple:
+            - np.ndarray: The shortest path distance matrix.
+            - np.ndarray: The shortest path predecessor matrix.
+    """
+    sparse_matrix = create_adjacency_matrix(edges, num_of_verts)
+    dist_matrix, pred_matrix = floyd_warshall(
+        csgraph=sparse_matrix, directed=False, return_predecessors=True
+    )
+
+    return dist_matrix, pred_matrix
+
+
+def contract_junctions(
+    vertices: list[gh.Vertex], edges: list[gh.Edge], city_bound: int
+) -> tuple[list[gh.Vertex], gh.Reduction]:
+    """
+    Contracts chains of zero-weight junctions of degree 2 into composite
+    edges.
+
+    Such junctions are neither demands nor facility candidates and every
+    shortest path through them follows the whole chain, so removing them
+    doesn't change the distances between the remaining vertices. Cities keep
+    their labels, the remaining junctions are relabeled after them.
+
+    Args:
+        vertices (list[gh.Vertex]): The vertices of the graph.
+        edges (list[gh.Edge]): The edges of the graph.
+        city_bound (int): The index boundary separating city nodes from
+        junction nodes. If set to 0, nothing is contracted.
+
+    Returns:
+        tuple:
+            - list[gh.Vertex]: The vertices of the reduced graph.
+            - gh.Reduction: The mapping between the reduced and the original
+            graph.
+    """
+    incident = [[] for _ in vertices]
+    for i, e in enumerate(edges):
+        incident[e.v1].append(i)
+        incident[e.v2].append(i)
+
+    contract = [
+        city_bound != 0
+        and v.label >= city_bound
+        and v.weight == 0
+        and len(incident[v.label]) == 2
+        and incident[v.label][0] != incident[v.label][1]
+        for v in vertices
+    ]
+
+    def other_end(i: int, v: int) -> int:
+        return edges[i].v2 if edges[i].v1 == v else edges[i].v1
+
+    visited = [False for _ in edges]
+    chains = []
+    ends = []
+    positions = {}
+    for v in vertices:
+        if contract[v.label]:
+            continue
+
+        for i in incident[v.label]:
+            if visited[i]:
+                continue
+
+            chain = [i]
+            visited[i] = True
+            current = other_end(i, v.label)
+            while contract[current]:
+                positions[current] = (len(chains), len(chain))
+                i = incident[current][0]
+                if i == chain[-1]:
+                    i = incident[current][1]
+                chain.append(i)
+                visited[i] = True
+                current = other_end(i, current)
+
+            chains.append(chain)
+            ends.append((v.label, current))
+
+    # Cycles made only of junctions have no vertex to start a chain from, so
+    # they are kept as they are.
+    for i, e in enumerate(edges):
+        if not visited[i]:
+            contract[e.v1] = False
+            contract[e.v2] = False
+            positions.pop(e.v1, None)
+            positions.pop(e.v2, None)
+            chains.append([i])
+            ends.append((e.v1, e.v2))
+
+    labels = [-1 for _ in vertices]
+    reduced_vertices = []
+    for v in vertices:
+        if not contract[v.label]:
+            labels[v.label] = len(reduced_vertices)
+            reduced_vertices.append(
+                gh.Vertex(len(reduced_vertices), v.weight, v.name)
+            )
+
+    ends = [(labels[v1], labels[v2]) for v1, v2 in ends]
+
+    return reduced_vertices, gh.Reduction(labels, chains, ends, positions)
+
+
+def expand_dist_matrix(
+    reduction: gh.Reduction, edges: list[gh.Edge], dist_matrix: np.ndarray
+) -> np.ndarray:
+    """
+    Computes the distances from every original vertex to the vertices of the
+    reduced graph.
+
+    A contracted vertex can only be left through one of the two ends of its
+    chain, so its distance is the shorter of the two ways.
+
+    Args:
+        reduction (gh.Reduction): The mapping between the reduced and the
+        original graph.
+        edges (list[gh.Edge]): The original edges, possibly elongated.
+        dist_matrix (np.ndarray): Distance matrix of the reduced graph.
+
+    Returns:
+        np.ndarray: A 2D array indexed by the original and the reduced label.
+    """
+    expanded = np.empty((len(reduction.labels), dist_matrix.shape[1]))
+
+    for label, reduced_label in enumerate(reduction.labels):
+        if reduced_label >= 0:
+            expanded[label] = dist_matrix[reduced_label]
+
+    for label, (c, position) in reduction.positions.items():
+        chain = reduction.chains[c]
+        v1, v2 = reduction.ends[c]
+        before = sum(edges[i].cost for i in chain[:position])
+        after = sum(edges[i].cost for i in chain[position:])
+        expanded[label] = np.minimum(
+            before + dist_matrix[v1], after + dist_matrix[v2]
+        )
+
+    return expanded
+
+
+def get_graph_edges(graph: gh.Graph, edges: list[gh.Edge]) -> list[gh.Edge]:
+    """
+    Returns the edges the heavy computation runs on.
+
+    Args:
+        graph (gh.Graph): The graph, possibly reduced.
+        edges (list[gh.Edge]): The original edges, possibly elongated.
+
+    Returns:
+        list[gh.Edge]: The composite edges if the graph is reduced, otherwise
+        the given edges.
+    """
+    if graph.reduction is None:
+        return edges
+    return graph.reduction.get_edges(edges)
+
+
+def create_graph_dist_matrix(
+    graph: gh.Graph, edges: list[gh.Edge]
+) -> np.ndarray:
+    """
+    Creates the distance matrix of the graph for the given original edges.
+
+    If the graph is reduced, the costs of the original edges are summed into
+    the composite edges first and the matrix covers only the vertices of the
+    reduced graph.
+
+    Args:
+        graph (gh.Graph): The graph, possibly reduced.
+        edges (list[gh.Edge]): The original edges, possibly elongated.
+
+    Returns:
+        np.ndarray: A 2D array representing the shortest path distance matrix.
+    """
+    return create_dist_matrix(get_graph_edges(graph, edges), graph.num_of_verts)
+
+
+def get_objective(
+    dist_matrix: np.ndarray, vertices: list[gh.Vertex], medians: list[int]
+) -> float:
+    """
+    Computes the p-median objective value of fixed medians.
+
+    Args:
+        dist_matrix (np.ndarray): Distance matrix of the graph.
+        vertices (list[gh.Vertex]): List of vertex objects with weights.
+        medians (list[int]): List of the p-median vertex labels.
+
+    Returns:
+        float: The total weighted distance of the vertices to their nearest
+        median.
+    """
+    demands = [v for v in vertices if v.weight > 0]
+    weights = np.array([v.weight for v in demands])
+    rows = dist_matrix[[v.label for v in demands]]
+    return float(np.sum(weights * rows[:, medians].min(axis=1)))
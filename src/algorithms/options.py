@@ -0,0 +1,41 @@
+class SolverOptions:
+    """
+    Represents the settings passed to the CBC solver.
+    """
+
+    def __init__(
+        self,
+        threads: int | None = None,
+        time_limit: float | None = None,
+        gap: float | None = None,
+        quiet: bool = False,
+        nearest: int | None = None,
+        aggregate: float | None = None,
+    ):
+        """
+        Initializes a SolverOptions instance.
+
+        Args:
+            threads (int | None, optional): Maximum number of solver threads.
+            Default is the CBC default (single thread).
+            time_limit (float | None, optional): Time limit of one solve in
+            seconds. Default is no limit.
+            gap (float | None, optional): Relative MIP gap at which the solver
+            stops. Default is the CBC default.
+            quiet (bool, optional): If True, the solver log is not printed.
+            Default is False.
+            nearest (int | None, optional): If set, the p-median problem is
+            solved with assignment variables only for this many nearest
+            candidates of each demand (see pulp_solve_sparse). Default is the
+            full model.
+            aggregate (float | None, optional): If set, demands with the same
+            distances to all candidates are merged before solving the p-median
+            problem (see aggregate_demands), the value is the tolerance of
+            the distances. Default is no aggregation.
+        """
+        self.threads = threads
+        self.time_limit = time_limit
+        self.gap = gap
+        self.quiet = quiet
+        self.nearest = nearest
+        self.aggregate = aggregate
@@ -1,5 +1,6 @@
-import statistics as stt
+import numpy as np
 
+import algorithms as alg
 import graph as gh
 
 SPEED = 110  # Define constant for speed
@@ -8,10 +9,12 @@ SPEED = 110  # Define constant for speed
 def output_solution(
     k: float,
     k_lim: float,
-    cost_ratios: list[float],
+    cost_ratios: np.ndarray,
     medians: list[int],
     objective: float,
     file: str,
+    status: str | None = None,
+    bound: float | None = None,
 ):
     """
     Outputs the solution data (speed declines, p-medians) to a file.
@@ -20,15 +23,18 @@ def output_solution(
         k (float): The value of k for the elongation.
         k_lim (float): The upper limit for k.
         objective (float): Objective value of solution.
-        cost_ratios (list[float]): List of cost ratios for edge elongation.
+        cost_ratios (np.ndarray): Cost ratios for edge elongation.
         medians (list[int]): List of the p-median vertex labels.
         file (str): The name of the output file.
+        status (str | None, optional): Solution status reported by the solver.
+        bound (float | None, optional): Best known lower bound of the objective
+        value.
     """
 
-    minimum = SPEED - (max(cost_ratios) * SPEED)
-    maximum = SPEED - (min(cost_ratios) * SPEED)
-    average = SPEED - (stt.mean(cost_ratios) * SPEED)
-    modus = SPEED - (stt.mode(cost_ratios) * SPEED)
+    minimum = SPEED - (cost_ratios.max() * SPEED)
+    maximum = SPEED - (cost_ratios.min() * SPEED)
+    average = SPEED - (cost_ratios.mean() * SPEED)
+    modus = SPEED - (alg.get_mode(cost_ratios) * SPEED)
 
     with open(f"results/{file}.txt", "a") as f:
         f.write("----------\n")
@@ -44,68 +50,201 @@ def output_solution(
             f"Average speed decline: {average:.4f}\n"
             f"Most often speed decline: {modus:.4f}\n"
         )
+        if status is None or bound is None:
+            return
+        if status != alg.OPTIMAL or alg.has_gap(objective, bound):
+            f.write(f"Solver status: {status}\nBest bound: {bound:.4f}")
+            if 0 < objective < float("inf"):
+                f.write(f", gap: {(objective - bound) / objective:.4%}")
+            f.write("\n")
 
 
-def output_edge_behavior(
-    original_edges: list[gh.Edge],
-    elongated_edges: list[gh.Edge],
-    medians: list[int],
-    file: str,
-):
+def output_edge_behavior(behavior: alg.EdgeBehavior, file: str):
     """
     Outputs the edge elongation behavior, including smallest and biggest ratio
-    changes, and incident edges.
+    changes, incident edges and the distribution of speed declines.
 
     Args:
-        original_edges (list[gh.Edge]): The original edges.
-        elongated_edges (list[gh.Edge]): The elongated edges.
-        medians (list[int]): List of the p-median vertex labels.
+        behavior (alg.EdgeBehavior): The elongation of the edges.
         file (str): The name of the output file.
     """
 
-    edges_with_ratios = zip(original_edges, elongated_edges)
-    sorted_edges = sorted(
-        edges_with_ratios,
-        key=lambda pair: pair[0].cost / pair[1].cost,
-        reverse=True,
+    with open(f"results/{file}.txt", "a") as f:
+
+        def write_edges(label, indices):
+            f.write(
+                "----------\n"
+                f"{label}\nSpeed decline, edge -> elongated cost\n"
+            )
+            for i in indices:
+                f.write(
+                    f"{behavior.declines[i]:.4f}, "
+                    f"{behavior.original_edges[i]} -> "
+                    f"{behavior.elongated_edges[i].cost:.4f}\n"
+                )
+
+        write_edges(
+            "Smallest speed declines:", behavior.get_smallest_declines()
+        )
+        write_edges("Biggest speed declines:", behavior.get_biggest_declines())
+        write_edges("Incident edges to medians:", behavior.get_incident_edges())
+        write_distribution(f, behavior.get_distribution())
+        f.write("\n")
+
+
+def write_distribution(f, distribution: np.ndarray):
+    """
+    Writes the number of edges in each speed decline bin.
+
+    Args:
+        f: The opened output file.
+        distribution (np.ndarray): Number of edges in each bin.
+    """
+    bounds = alg.get_bin_edges()
+    f.write(
+        "----------\n"
+        "Speed decline distribution:\n"
+        "Speed decline range, number of edges\n"
     )
+    for low, high, count in zip(bounds, bounds[1:], distribution):
+        f.write(f"{low:.4f} - {high:.4f}: {count}\n")
 
-    smallest_decline = sorted_edges[:10]
-    biggest_decline = sorted_edges[-10:]
 
-    incident_edges = [
-        (original, elongated)
-        for original, elongated in sorted_edges
-        if original.v1 in medians or original.v2 in medians
-    ]
+def output_behavior_summary(summary: alg.BehaviorSummary, file: str):
+    """
+    Outputs the speed decline statistics accumulated over the change points
+    of several experiments, for each experiment and in total.
 
-    incident_edge_ratios = [
-        (original, elongated, original.cost / elongated.cost)
-        for original, elongated in incident_edges
+    Args:
+        summary (alg.BehaviorSummary): The accumulated statistics.
+        file (str): The name of the output file.
+    """
+    sections = [
+        (f"Region: {region}, p: {p}, experiment: {experiment}", stats)
+        for (region, p, experiment), stats in summary.experiments.items()
     ]
+    sections.append(("All experiments", summary.get_total()))
 
     with open(f"results/{file}.txt", "a") as f:
-
-        def write_zipped_edges(label, zipped_edges):
+        for label, stats in sections:
+            ks = ", ".join(f"{k:.4f}" for k in sorted(stats["ks"]))
             f.write(
                 "----------\n"
-                f"{label}\nSpeed decline, edge -> elongated cost\n"
+                f"{label}\n"
+                f"Change points: {len(stats['ks'])}\n"
+                f"k: {ks}\n"
+                f"Min speed decline: {stats['minimum']:.4f}\n"
+                f"Max speed decline: {stats['maximum']:.4f}\n"
+                "Average speed decline: "
+                f"{stats['total'] / stats['count']:.4f}\n"
             )
-            for original, elongated in zipped_edges:
-                ratio = original.cost / elongated.cost
-                speed = SPEED - (ratio * SPEED)
-                f.write(f"{speed:.4f}, {original} -> {elongated.cost:.4f}\n")
+            write_distribution(f, stats["distribution"])
+        f.write("\n")
+
 
-        write_zipped_edges("Smallest speed declines:", smallest_decline)
-        write_zipped_edges("Biggest speed declines:", biggest_decline)
+def output_edge_criticality(
+    edges: list[gh.Edge],
+    deltas: list[float],
+    resolved: list[tuple[int, list[int], float, str]],
+    medians: list[int],
+    objective: float,
+    slowdown: float,
+    file: str,
+):
+    """
+    Outputs the edge criticality ranking, including the exact solutions for
+    the top ranked edges.
+
+    Args:
+        edges (list[gh.Edge]): The original edges.
+        deltas (list[float]): Fixed-medians objective delta for each edge.
+        resolved (list[tuple[int, list[int], float, str]]): Edge index,
+        p-medians, objective value and solution status of the exact solutions
+        for the top ranked edges.
+        medians (list[int]): List of the p-median vertex labels.
+        objective (float): Objective value of the original solution.
+        slowdown (float): Factor applied to the cost of the tested edge.
+        file (str): The name of the output file.
+    """
+
+    critical_edges = [i for i, delta in enumerate(deltas) if delta > 0]
+    critical_edges.sort(key=lambda i: deltas[i], reverse=True)
+
+    with open(f"results/{file}.txt", "a") as f:
+        f.write(
+            "----------\n"
+            f"Objective value: {objective:.4f}\n"
+            f"Weighted p-medians:\n{medians}\n"
+            f"Edge slowdown: {slowdown:.4f}\n"
+            f"Speed decline: {SPEED - (SPEED / slowdown):.4f}\n"
+            f"Critical edges: {len(critical_edges)} of {len(edges)}\n"
+        )
 
         f.write(
             "----------\n"
-            + "Incident edges to medians:\n"
-            + "Speed decline, edge -> elongated cost\n"
+            "Exactly solved edges:\n"
+            "Edge, objective delta -> objective value, p-medians\n"
         )
+        for i, new_medians, new_objective, status in resolved:
+            if status != alg.OPTIMAL:
+                changed = f" ({status})"
+            elif new_medians != medians:
+                changed = " (changed)"
+            else:
+                changed = ""
+            f.write(
+                f"{edges[i]}, {deltas[i]:.4f} -> {new_objective:.4f}, "
+                f"{new_medians}{changed}\n"
+            )
 
-        for original, elongated, ratio in incident_edge_ratios:
-            speed = SPEED - (ratio * SPEED)
-            f.write(f"{speed:.4f}, {original} -> {elongated.cost:.4f}\n")
+        f.write(
+            "----------\n"
+            "Edge criticality ranking:\n"
+            "Edge, fixed-medians objective delta\n"
+        )
+        for i in critical_edges:
+            f.write(f"{edges[i]}, {deltas[i]:.4f}\n")
+        f.write("\n")
+
+
+def output_breakpoints(
+    segments: list[list],
+    unproven: list[tuple[float, float]],
+    k_lim: float,
+    num_of_solves: int,
+    file: str,
+):
+    """
+    Outputs the piecewise-constant map of k to the p-medians.
+
+    Args:
+        segments (list[list]): First k, last k, p-medians, objective values at
+        the first and the last k and solution status of each segment.
+        unproven (list[tuple[float, float]]): Intervals of k between two
+        segments with a solution at either end not proven optimal.
+        k_lim (float): The upper limit for k.
+        num_of_solves (int): Number of solved values of k.
+        file (str): The name of the output file.
+    """
+
+    with open(f"results/{file}.txt", "a") as f:
+        f.write(
+            "----------\n"
+            f"Upper limit: {k_lim:.4f}\n"
+            f"Number of solves: {num_of_solves}\n"
+            f"Number of breakpoints: {len(segments) - 1 - len(unproven)}\n"
+            f"Number of unproven changes: {len(unproven)}\n"
+        )
+        for first_k, last_k in unproven:
+            f.write(f"Unproven change in k: {first_k:.4f} - {last_k:.4f}\n")
+
+        for first_k, last_k, medians, obj_first, obj_last, status in segments:
+            f.write(
+                "----------\n"
+                f"k: {first_k:.4f} - {last_k:.4f}\n"
+                f"Objective value: {obj_first:.4f} - {obj_last:.4f}\n"
+                f"Weighted p-medians:\n{medians}\n"
+            )
+            if status != alg.OPTIMAL:
+                f.write(f"Solver status: {status}\n")
         f.write("\n")
@@ -0,0 +1,147 @@
+import json
+import os
+import signal
+
+
+class ProgressEvent:
+    """
+    Represents the progress of a k sweep after one solved value of k.
+    """
+
+    def __init__(
+        self,
+        k: float,
+        medians: list[int],
+        objective: float,
+        status: str,
+        solve_time: float,
+        eta: float | None,
+    ):
+        """
+        Initializes a ProgressEvent instance.
+
+        Args:
+            k (float): The solved value of k.
+            medians (list[int]): List of the p-median vertex labels.
+            objective (float): Objective value of the solution.
+            status (str): Solution status reported by the solver.
+            solve_time (float): Time spent on this value of k in seconds.
+            eta (float | None): Estimated remaining time of the sweep in
+            seconds, None if it can't be estimated.
+        """
+        self.k = k
+        self.medians = medians
+        self.objective = objective
+        self.status = status
+        self.solve_time = solve_time
+        self.eta = eta
+
+    def __str__(self) -> str:
+        """
+        Returns a string representation of the event in the format:
+        k, objective, solve time, ETA.
+
+        Returns:
+            str: A human-readable string representation of the event.
+        """
+        eta = "unknown" if self.eta is None else f"{self.eta:.0f} s"
+        return (
+            f"k: {self.k:.4f}, objective: {self.objective:.4f}, "
+            f"solve time: {self.solve_time:.1f} s, ETA: {eta}"
+        )
+
+
+def print_progress(event: ProgressEvent):
+    """
+    Prints the progress event to the standard output.
+
+    Args:
+        event (ProgressEvent): The progress of the sweep.
+    """
+    print(f"Progress: {event}")
+
+
+class Interruption:
+    """
+    Catches SIGINT during a sweep, so it can stop after the current value of k
+    with its checkpoint saved. A second SIGINT stops immediately.
+    """
+
+    def __init__(self):
+        """
+        Initializes an Interruption instance.
+        """
+        self.requested = False
+        self.previous_handler = None
+
+    def __enter__(self) -> "Interruption":
+        self.previous_handler = signal.signal(signal.SIGINT, self.handle)
+        return self
+
+    def __exit__(self, *exc_info):
+        signal.signal(signal.SIGINT, self.previous_handler)
+
+    def handle(self, signum, frame):
+        """
+        Handles SIGINT by requesting the sweep to stop.
+        """
+        if self.requested:
+            raise KeyboardInterrupt
+        self.requested = True
+        print("Interrupted, stopping after the current k.")
+
+
+def get_checkpoint_path(file: str) -> str:
+    """
+    Returns the path of the checkpoint belonging to the output file.
+
+    Args:
+        file (str): The name of the output file.
+
+    Returns:
+        str: The path of the checkpoint file.
+    """
+    return f"results/{file}.checkpoint.json"
+
+
+def save_checkpoint(file: str, state: dict):
+    """
+    Saves the state of a sweep, replacing the previous checkpoint atomically.
+
+    Args:
+        file (str): The name of the output file.
+        state (dict): The state of the sweep.
+    """
+    path = get_checkpoint_path(file)
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(state, f)
+    os.replace(f"{path}.tmp", path)
+
+
+def load_checkpoint(file: str) -> dict | None:
+    """
+    Loads the saved state of a sweep.
+
+    Args:
+        file (str): The name of the output file.
+
+    Returns:
+        dict | None: The state of the sweep, None if there is no checkpoint.
+    """
+    path = get_checkpoint_path(file)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def remove_checkpoint(file: str):
+    """
+    Removes the checkpoint of a finished sweep.
+
+    Args:
+        file (str): The name of the output file.
+    """
+    path = get_checkpoint_path(file)
+    if os.path.exists(path):
+        os.remove(path)
@@ -1,13 +1,28 @@
+import concurrent.futures
+import copy
+import os
+import re
+import select
+import tempfile
 from itertools import combinations
 
 import numpy as np
 import pulp as pl
 
+import algorithms as alg
 import graph as gh
 
 P_MEDIAN = "p-median"
 P_CENTER = "p-center"
 
+OPTIMAL = pl.LpSolution[pl.LpSolutionOptimal]
+FEASIBLE = pl.LpSolution[pl.LpSolutionIntegerFeasible]
+BOUND_TOLERANCE = 1e-6  # Relative, CBC prints the bound rounded
+
+LOG_INTERVAL = 1.0  # Seconds between reads of the solver log
+
+NEAREST_CANDIDATES = 10
+
 
 def create_lp_variables(
     n: int, m: int
@@ -135,10 +150,15 @@ def pulp_solve(
     p: int,
     problem_type: str,
     city_bound: int = 0,
-) -> tuple[list[int], float]:
+    options: alg.SolverOptions | None = None,
+) -> tuple[list[int], float, str, float]:
     """
     Solves the p-median or p-center problem using PuLP.
 
+    If the solver stops early (time limit or MIP gap), the best found
+    solution is returned together with the best known lower bound, so the
+    caller can decide how to treat a non-optimal result.
+
     Args:
         dist_matrix (np.ndarray): Distance matrix of the graph.
         vertices (list[gh.Vertex]): List of vertex objects with weights.
@@ -147,10 +167,30 @@ def pulp_solve(
         city_limit (int, optional): Index where junctions start in the vertex
         list. Facilities can only be placed at indices [0, city_limit). If set
         to 0, no restriction is applied (all vertices are eligible).
+        options (alg.SolverOptions | None, optional): Settings of the solver.
+        If not given, the default settings are used.
 
     Returns:
-        list[int]: Indices of the selected median locations.
+        tuple:
+            - list[int]: Indices of the selected median locations.
+            - float: Objective value of the solution (infinity if no solution
+            was found).
+            - str: Solution status reported by the solver.
+            - float: Best known lower bound of the objective value.
     """
+    if options is None:
+        options = alg.SolverOptions()
+
+    if problem_type == P_MEDIAN and options.aggregate is not None:
+        return pulp_solve_aggregated(
+            dist_matrix, vertices, p, city_bound, options
+        )
+
+    if problem_type == P_MEDIAN and options.nearest is not None:
+        return pulp_solve_sparse(
+            dist_matrix, vertices, p, city_bound, options, options.nearest
+        )
+
     n, m = dist_matrix.shape
 
     problem = pl.LpProblem(f"Weighted_{problem_type}", pl.LpMinimize)
@@ -169,14 +209,478 @@ def pulp_solve(
         add_additional_constraint(problem, x, z, n, m, dist_matrix, vertices)
         problem += z
 
-    problem.solve()
+    log = run_solver(problem, options)
+
+    status = pl.LpSolution[problem.sol_status]
+    if problem.sol_status in (
+        pl.LpSolutionOptimal,
+        pl.LpSolutionIntegerFeasible,
+    ):
+        selected_set = [j for j in range(m) if y[j].varValue == 1.0]
+        objective = pl.value(problem.objective)
+    else:
+        selected_set = []
+        objective = float(np.inf)
+
+    bound = get_lower_bound(log, objective, status)
+    status = get_status(log, objective, status, bound)
+
+    print(f"Selected set: {selected_set}, status: {status}\n")
+
+    return selected_set, objective, status, bound
+
+
+def create_solver(options: alg.SolverOptions, log_path: str) -> pl.LpSolver:
+    """
+    Creates the CBC solver with the given settings.
+
+    Args:
+        options (alg.SolverOptions): Settings of the solver.
+        log_path (str): The path of the file the solver log is written to.
+
+    Returns:
+        pl.LpSolver: The configured solver.
+    """
+    return pl.PULP_CBC_CMD(
+        threads=options.threads,
+        timeLimit=options.time_limit,
+        gapRel=options.gap,
+        msg=False,
+        logPath=log_path,
+    )
+
+
+def run_solver(problem: pl.LpProblem, options: alg.SolverOptions) -> str:
+    """
+    Solves the problem with CBC and collects the solver log.
+
+    On POSIX systems CBC writes its log to a pseudo-terminal, so it flushes
+    every line and the log is printed while the solver is still running.
+    Elsewhere the log is written to a temporary file and printed after the
+    solve.
+
+    Args:
+        problem (pl.LpProblem): The LP problem to solve.
+        options (alg.SolverOptions): Settings of the solver.
+
+    Returns:
+        str: The CBC solver log.
+    """
+    if os.name == "posix":
+        return run_solver_in_terminal(problem, options)
+
+    log_fd, log_path = tempfile.mkstemp(suffix=".log")
+    os.close(log_fd)
+    try:
+        problem.solve(create_solver(options, log_path))
+        with open(log_path, "r") as file:
+            log = file.read()
+    finally:
+        os.remove(log_path)
+
+    if not options.quiet:
+        print(log)
+
+    return log
+
+
+def run_solver_in_terminal(
+    problem: pl.LpProblem, options: alg.SolverOptions
+) -> str:
+    """
+    Solves the problem with CBC in a separate thread and reads its log from a
+    pseudo-terminal while it runs.
+
+    Args:
+        problem (pl.LpProblem): The LP problem to solve.
+        options (alg.SolverOptions): Settings of the solver.
+
+    Returns:
+        str: The CBC solver log.
+    """
+    import pty
+    import termios
+
+    master, slave = pty.openpty()
+    attributes = termios.tcgetattr(slave)
+    attributes[1] &= ~termios.ONLCR  # Keep the line endings of the log
+    termios.tcsetattr(slave, termios.TCSANOW, attributes)
+
+    chunks = []
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(
+                problem.solve, create_solver(options, os.ttyname(slave))
+            )
+            while True:
+                timeout = 0 if future.done() else LOG_INTERVAL
+                ready, _, _ = select.select([master], [], [], timeout)
+                if not ready:
+                    if future.done():
+                        break
+                    continue
+                chunks.append(os.read(master, 4096).decode(errors="replace"))
+                if not options.quiet:
+                    print(chunks[-1], end="", flush=True)
+            future.result()
+    finally:
+        os.close(master)
+        os.close(slave)
+
+    if not options.quiet:
+        print()
+
+    return "".join(chunks)
+
+
+def pulp_solve_sparse(
+    dist_matrix: np.ndarray,
+    vertices: list[gh.Vertex],
+    p: int,
+    city_bound: int = 0,
+    options: alg.SolverOptions | None = None,
+    nearest: int = NEAREST_CANDIDATES,
+) -> tuple[list[int], float, str, float]:
+    """
+    Solves the p-median problem using PuLP with assignment variables only for
+    the nearest candidates of each demand.
+
+    Every demand gets assignment variables for its nearest candidates and one
+    extra variable for being served by any pruned candidate, priced with the
+    distance to its nearest pruned candidate. This makes the model a
+    relaxation of the full one. If no demand uses the extra variable in the
+    optimal solution, the solution is optimal for the full model as well.
+    Otherwise the number of candidates of those demands is doubled and the
+    problem is solved again.
+
+    Args:
+        dist_matrix (np.ndarray): Distance matrix of the graph.
+        vertices (list[gh.Vertex]): List of vertex objects with weights.
+        p (int): Number of medians to select.
+        city_bound (int, optional): Index where junctions start in the vertex
+        list. Facilities can only be placed at indices [0, city_bound). If set
+        to 0, no restriction is applied (all vertices are eligible).
+        options (alg.SolverOptions | None, optional): Settings of the solver.
+        If not given, the default settings are used.
+        nearest (int, optional): Initial number of nearest candidates of each
+        demand.
+
+    Returns:
+        tuple:
+            - list[int]: Indices of the selected median locations.
+            - float: Objective value of the solution (infinity if no solution
+            was found).
+            - str: Solution status reported by the solver.
+            - float: Best known lower bound of the objective value.
+    """
+    if options is None:
+        options = alg.SolverOptions()
+
+    n, m = dist_matrix.shape
+    if city_bound != 0:
+        m = city_bound
+
+    candidates = np.argsort(dist_matrix[:, :m], axis=1, kind="stable")
+    num_nearest = [min(nearest, m) for _ in range(n)]
+
+    while True:
+        problem = pl.LpProblem(f"Weighted_{P_MEDIAN}_sparse", pl.LpMinimize)
+
+        y = pl.LpVariable.dicts("y", [j for j in range(m)], cat="Binary")
+        x = pl.LpVariable.dicts(
+            "x",
+            [
+                (i, int(j))
+                for i in range(n)
+                for j in candidates[i, : num_nearest[i]]
+            ],
+            cat="Binary",
+        )
+        pruned = pl.LpVariable.dicts(
+            "pruned", [i for i in range(n) if num_nearest[i] < m], cat="Binary"
+        )
+
+        for i in range(n):
+            nearest_x = [
+                x[(i, int(j))] for j in candidates[i, : num_nearest[i]]
+            ]
+            if i in pruned:
+                problem += pl.lpSum(nearest_x) + pruned[i] == 1
+            else:
+                problem += pl.lpSum(nearest_x) == 1
+
+            for j in candidates[i, : num_nearest[i]]:
+                problem += x[(i, int(j))] <= y[int(j)]
+
+        problem += pl.lpSum(y[j] for j in range(m)) == p
+
+        problem += pl.lpSum(
+            vertices[i].weight * dist_matrix[i][j] * x[(i, j)] for i, j in x
+        ) + pl.lpSum(
+            vertices[i].weight
+            * dist_matrix[i][candidates[i, num_nearest[i]]]
+            * pruned[i]
+            for i in pruned
+        )
+
+        log = run_solver(problem, options)
+        status = pl.LpSolution[problem.sol_status]
+
+        if problem.sol_status not in (
+            pl.LpSolutionOptimal,
+            pl.LpSolutionIntegerFeasible,
+        ):
+            print(f"Selected set: [], status: {status}\n")
+            return (
+                [],
+                float(np.inf),
+                status,
+                get_lower_bound(log, float(np.inf), status),
+            )
+
+        bound = get_lower_bound(log, pl.value(problem.objective), status)
+        status = get_status(log, pl.value(problem.objective), status, bound)
+
+        violated = [
+            i
+            for i in pruned
+            if pruned[i].varValue == 1.0 and vertices[i].weight > 0
+        ]
+        if status != OPTIMAL or not violated:
+            break
+
+        print(f"Growing nearest candidates of {len(violated)} demands")
+        for i in violated:
+            num_nearest[i] = min(2 * num_nearest[i], m)
 
     selected_set = [j for j in range(m) if y[j].varValue == 1.0]
-    objective = pl.value(problem.objective)
+    objective = alg.get_objective(dist_matrix, vertices, selected_set)
+    if status == OPTIMAL:
+        # The bound comes from the objective of CBC, which can differ from the
+        # recomputed one by rounding.
+        bound = min(bound, objective)
+
+    print(f"Selected set: {selected_set}, status: {status}\n")
+
+    return selected_set, objective, status, bound
+
+
+def aggregate_demands(
+    dist_matrix: np.ndarray,
+    vertices: list[gh.Vertex],
+    city_bound: int = 0,
+    tolerance: float = 0.0,
+) -> tuple[np.ndarray, list[gh.Vertex], float]:
+    """
+    Merges demands with the same distances to all candidates into weighted
+    super-demands.
+
+    Demands with zero weight are left out. With zero tolerance only demands
+    with identical distance rows are merged, which doesn't change the optimal
+    p-medians. Otherwise the rows are clustered (see cluster_rows), so every
+    demand is within the tolerance of the first demand of its super-demand in
+    each distance, and every super-demand gets the weighted mean row of its
+    demands.
+
+    Args:
+        dist_matrix (np.ndarray): Distance matrix of the graph.
+        vertices (list[gh.Vertex]): List of vertex objects with weights.
+        city_bound (int, optional): Index where junctions start in the vertex
+        list. Only the distances to the candidates [0, city_bound) are
+        compared. If set to 0, all vertices are candidates.
+        tolerance (float, optional): Largest difference of distances of
+        merged demands to their cluster leader, 0 for exact merging.
+
+    Returns:
+        tuple:
+            - np.ndarray: Distance matrix with one row per super-demand.
+            - list[gh.Vertex]: The super-demands with summed weights.
+            - float: Upper bound of the objective value error caused by the
+            merging.
+    """
+    m = city_bound if city_bound != 0 else dist_matrix.shape[1]
+
+    weights = np.array([v.weight for v in vertices])
+    demands = np.flatnonzero(weights > 0)
+    rows = dist_matrix[demands]
+
+    keys, groups = np.unique(rows[:, :m], axis=0, return_inverse=True)
+    groups = groups.ravel()
+    if tolerance > 0:
+        groups = cluster_rows(keys, tolerance)[groups]
+    num_of_groups = groups.max() + 1 if len(groups) else 0
+
+    group_weights = np.bincount(
+        groups, weights=weights[demands], minlength=num_of_groups
+    )
+    group_rows = np.zeros((num_of_groups, dist_matrix.shape[1]))
+    np.add.at(group_rows, groups, weights[demands, None] * rows)
+    group_rows /= group_weights[:, None]
+
+    deviations = np.abs(rows[:, :m] - group_rows[groups, :m]).max(axis=1)
+    error = float(np.sum(weights[demands] * deviations))
+
+    group_sizes = np.bincount(groups, minlength=num_of_groups)
+    super_demands = [
+        gh.Vertex(g, float(group_weights[g]), f"{group_sizes[g]} demands")
+        for g in range(num_of_groups)
+    ]
+
+    return group_rows, super_demands, error
+
+
+def cluster_rows(rows: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    Clusters the rows greedily by their largest coordinate difference.
+
+    Every row joins the nearest cluster whose first row, its leader, differs
+    from it by at most the tolerance in each coordinate, otherwise it becomes
+    the leader of a new cluster.
+
+    Args:
+        rows (np.ndarray): The rows to cluster.
+        tolerance (float): Largest coordinate difference from the leader.
+
+    Returns:
+        np.ndarray: Cluster index of each row.
+    """
+    leaders = []
+    clusters = np.empty(len(rows), dtype=int)
+    for i, row in enumerate(rows):
+        if leaders:
+            differences = np.abs(rows[leaders] - row).max(axis=1)
+            nearest = int(np.argmin(differences))
+            if differences[nearest] <= tolerance:
+                clusters[i] = nearest
+                continue
+        clusters[i] = len(leaders)
+        leaders.append(i)
+    return clusters
+
+
+def pulp_solve_aggregated(
+    dist_matrix: np.ndarray,
+    vertices: list[gh.Vertex],
+    p: int,
+    city_bound: int = 0,
+    options: alg.SolverOptions | None = None,
+) -> tuple[list[int], float, str, float]:
+    """
+    Solves the p-median problem using PuLP with the demands merged into
+    super-demands first.
+
+    The objective value is evaluated again for the original demands and the
+    lower bound is lowered by the error bound of the merging. If the bound
+    then falls below the objective value, the solution isn't proven optimal
+    and is reported as feasible only.
+
+    Args:
+        dist_matrix (np.ndarray): Distance matrix of the graph.
+        vertices (list[gh.Vertex]): List of vertex objects with weights.
+        p (int): Number of medians to select.
+        city_bound (int, optional): Index where junctions start in the vertex
+        list. Facilities can only be placed at indices [0, city_bound). If set
+        to 0, no restriction is applied (all vertices are eligible).
+        options (alg.SolverOptions | None, optional): Settings of the solver,
+        its aggregate value is the tolerance of the merging.
 
-    print(f"Selected set: {selected_set}\n")
+    Returns:
+        tuple:
+            - list[int]: Indices of the selected median locations.
+            - float: Objective value of the solution (infinity if no solution
+            was found).
+            - str: Solution status reported by the solver.
+            - float: Best known lower bound of the objective value.
+    """
+    if options is None:
+        options = alg.SolverOptions(aggregate=0.0)
+
+    demand_matrix, demands, error = aggregate_demands(
+        dist_matrix, vertices, city_bound, options.aggregate or 0.0
+    )
+    print(
+        f"Aggregated {len(vertices)} demands into {len(demands)}, "
+        f"error bound: {error:.4f}"
+    )
+
+    solve_options = copy.copy(options)
+    solve_options.aggregate = None
+    medians, objective, status, bound = pulp_solve(
+        demand_matrix, demands, p, P_MEDIAN, city_bound, solve_options
+    )
+
+    if medians:
+        objective = alg.get_objective(dist_matrix, vertices, medians)
+    bound -= error
+    if status == OPTIMAL:
+        # The objective is recomputed on the original demands, the bound can
+        # exceed it by rounding.
+        bound = min(bound, objective)
+    status = get_status("", objective, status, bound)
+
+    return medians, objective, status, bound
+
+
+def get_lower_bound(log: str, objective: float, status: str) -> float:
+    """
+    Reads the best lower bound of the objective value from the CBC log.
+
+    CBC reports the lower bound only when it stops before proving
+    optimality, otherwise the bound equals the objective value.
+
+    Args:
+        log (str): The CBC solver log.
+        objective (float): Objective value of the found solution.
+        status (str): Solution status reported by the solver.
+
+    Returns:
+        float: The best known lower bound, or negative infinity if unknown.
+    """
+    match = re.search(r"^Lower bound:\s+(\S+)", log, re.MULTILINE)
+    if match:
+        return float(match.group(1))
+    if status == OPTIMAL:
+        return objective
+    return float(-np.inf)
+
+
+def get_status(log: str, objective: float, status: str, bound: float) -> str:
+    """
+    Checks that an optimal status reported by the solver is really proven.
+
+    CBC reports a solve stopped by the relative MIP gap as optimal. Such a
+    solution is reported as only feasible, so it is never compared as if it
+    were optimal.
 
-    return selected_set, objective
+    Args:
+        log (str): The CBC solver log.
+        objective (float): Objective value of the found solution.
+        status (str): Solution status reported by the solver.
+        bound (float): Best known lower bound of the objective value.
+
+    Returns:
+        str: The solution status.
+    """
+    if status != OPTIMAL:
+        return status
+    if "within gap tolerance" in log or has_gap(objective, bound):
+        return FEASIBLE
+    return status
+
+
+def has_gap(objective: float, bound: float) -> bool:
+    """
+    Checks whether the lower bound is below the objective value by more than
+    the rounding of the solver.
+
+    Args:
+        objective (float): Objective value of the found solution.
+        bound (float): Best known lower bound of the objective value.
+
+    Returns:
+        bool: True if the solution is not proven optimal by the bound.
+    """
+    return objective - bound > BOUND_TOLERANCE * max(1.0, abs(objective))
 
 
 def brut_force(graph: gh.Graph, p: int) -> list[gh.Vertex]:
@@ -1,3 +1,4 @@
 from .edge import Edge
 from .graph import Graph
+from .reduction import Reduction
 from .vertex import Vertex
@@ -1,35 +1,46 @@
-import algorithms as alg
-
-
 class Graph:
     """
     Represents a graph with vertices and edges, supporting operations such as
     distance matrix creation.
     """
 
-    def __init__(self, region: str):
+    def __init__(self, region: str, contract: bool = False):
         """
         Initializes a Graph instance by loading vertices and edges from
         region-specific files.
 
+        If contract is set, chains of zero-weight junctions are contracted.
+        The vertices and the distance matrix then belong to the reduced graph,
+        while the edges stay the original ones, so they can be elongated and
+        reported one by one.
+
         Args:
             region (str): The region name used to locate the input files
             containing graph data.
-            p (int): The number of weighted medians for the algorithm.
+            contract (bool, optional): If True, junction chains are contracted.
+            Default is False.
 
         The class expects the following input files in the
         ./res/Kraje_input_data/ directory:
             - Nodes file: VUC140318_<region>_nodes.txt
             - Edges file: VUC140318_<region>_edges.txt
         """
+        # Imported here, algorithms depend on this package.
+        import algorithms as alg
+
         self.vertices, self.city_bound = alg.read_vertices(
             f"./res/Kraje_input_data/VUC140318_{region}_nodes.txt"
         )
         self.edges = alg.read_edges(
             f"./res/Kraje_input_data/VUC140318_{region}_edges.txt"
         )
+        self.reduction = None
+        if contract:
+            self.vertices, self.reduction = alg.contract_junctions(
+                self.vertices, self.edges, self.city_bound
+            )
         self.num_of_verts = len(self.vertices)
-        self.dist_matrix = alg.create_dist_matrix(self.edges, self.num_of_verts)
+        self.dist_matrix = alg.create_graph_dist_matrix(self, self.edges)
         self.region = region
 
     def __str__(self) -> str:
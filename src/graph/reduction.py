@@ -0,0 +1,64 @@
+from .edge import Edge
+
+
+class Reduction:
+    """
+    Represents a graph reduced by contracting chains of zero-weight junctions
+    into composite edges, together with the mapping back to the original
+    vertices and edges.
+    """
+
+    def __init__(
+        self,
+        labels: list[int],
+        chains: list[list[int]],
+        ends: list[tuple[int, int]],
+        positions: dict[int, tuple[int, int]],
+    ):
+        """
+        Initializes a Reduction instance.
+
+        Args:
+            labels (list[int]): Reduced label of each original vertex, -1 for
+            contracted vertices.
+            chains (list[list[int]]): Indices of the original edges forming
+            each composite edge, ordered from its first to its second end.
+            ends (list[tuple[int, int]]): Reduced labels of the ends of each
+            composite edge.
+            positions (dict[int, tuple[int, int]]): Composite edge index and
+            the number of its original edges before the vertex, keyed by the
+            original label of each contracted vertex.
+        """
+        self.labels = labels
+        self.chains = chains
+        self.ends = ends
+        self.positions = positions
+
+    def get_edges(self, edges: list[Edge]) -> list[Edge]:
+        """
+        Creates the composite edges, each with the summed cost of its
+        original edges.
+
+        Args:
+            edges (list[Edge]): The original edges, possibly elongated.
+
+        Returns:
+            list[Edge]: The edges of the reduced graph.
+        """
+        return [
+            Edge(v1, v2, sum(edges[i].cost for i in chain))
+            for chain, (v1, v2) in zip(self.chains, self.ends)
+        ]
+
+    def get_edge_index(self) -> list[int]:
+        """
+        Returns the index of the composite edge containing each original edge.
+
+        Returns:
+            list[int]: Composite edge index for each original edge.
+        """
+        edge_index = [0 for _ in range(sum(map(len, self.chains)))]
+        for c, chain in enumerate(self.chains):
+            for i in chain:
+                edge_index[i] = c
+        return edge_index
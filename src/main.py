@@ -1,69 +1,316 @@
+import time
+
+START = time.perf_counter()
+
+import argparse
+import os
+import shlex
 import sys
 
 import algorithms as alg
 import graph as gh
 
+STARTED = time.perf_counter()
+
+EXPERIMENTS = {
+    "first-k": "F",
+    "all-ks": "A",
+    "breakpoints": "B",
+    "criticality": "C",
+}
+
+
+def add_experiment_arguments(parser: argparse.ArgumentParser):
+    """
+    Adds the arguments shared by all experiments to a subcommand parser.
+
+    Args:
+        parser (argparse.ArgumentParser): The parser of the subcommand.
+    """
+    parser.add_argument("region", type=str.upper, help="region acronym")
+    parser.add_argument("p", type=int, help="number of weighted medians")
+    parser.add_argument(
+        "--threads", type=int, help="maximum number of solver threads"
+    )
+    parser.add_argument(
+        "--time-limit", type=float, help="time limit of one solve in seconds"
+    )
+    parser.add_argument("--gap", type=float, help="relative MIP gap")
+    parser.add_argument(
+        "--quiet", action="store_true", help="do not print the solver log"
+    )
+    parser.add_argument(
+        "--nearest",
+        type=int,
+        help="assignment variables only for this many nearest candidates",
+    )
+    parser.add_argument(
+        "--aggregate",
+        type=float,
+        nargs="?",
+        const=0.0,
+        metavar="TOLERANCE",
+        help="merge demands with the same distances to all candidates",
+    )
+    parser.add_argument(
+        "--contract",
+        action="store_true",
+        help="contract chains of zero-weight junctions before computing",
+    )
+
+
+def create_parser() -> argparse.ArgumentParser:
+    """
+    Creates the command line parser with a subcommand for every experiment.
+
+    Returns:
+        argparse.ArgumentParser: The command line parser.
+    """
+    parser = argparse.ArgumentParser(prog="python src/main.py")
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="report the import times of the heavy modules",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    for command, alias in EXPERIMENTS.items():
+        subparser = subparsers.add_parser(
+            command, aliases=[alias, alias.lower()]
+        )
+        subparser.set_defaults(command=command)
+        add_experiment_arguments(subparser)
+        if command != "criticality":
+            subparser.add_argument(
+                "--resume",
+                action="store_true",
+                help="continue the experiment from its checkpoint",
+            )
+
+    evaluate = subparsers.add_parser(
+        "evaluate", help="objective value of fixed medians, without solving"
+    )
+    evaluate.add_argument("region", type=str.upper, help="region acronym")
+    evaluate.add_argument("k", type=float, help="sensitivity parameter")
+    evaluate.add_argument("medians", type=int, nargs="+", help="median labels")
+    evaluate.add_argument(
+        "--contract",
+        action="store_true",
+        help="contract chains of zero-weight junctions before computing",
+    )
+
+    batch = subparsers.add_parser(
+        "batch", help="run the subcommands listed in a file, one per line"
+    )
+    batch.add_argument("file", help="file with one subcommand per line")
+
+    return parser
+
 
-def parse_arguments() -> tuple[str, str, int]:
+def get_solver_options(args: argparse.Namespace) -> alg.SolverOptions:
     """
-    Parse and validate command line arguments.
+    Validates the experiment arguments and creates the solver settings.
+
+    Args:
+        args (argparse.Namespace): Parsed arguments of an experiment.
 
     Returns:
-        tuple[str, str, int]: Option for experiment, region acronym
-        and the number of weighted medians (P).
+        alg.SolverOptions: The solver settings.
 
     Raises:
-        ValueError: If arguments are missing or invalid.
+        ValueError: If arguments are invalid.
     """
-    if len(sys.argv) < 3:
-        raise ValueError(
-            "Too few arguments! Usage: python src/main.py <option> <region acronym> <P>"
-        )
+    if args.p <= 0:
+        raise ValueError("Invalid value for P. It must be a positive integer.")
+    if args.threads is not None and args.threads <= 0:
+        raise ValueError("Number of threads must be a positive integer.")
+    if args.time_limit is not None and args.time_limit <= 0:
+        raise ValueError("Time limit must be a positive number.")
+    if args.gap is not None and not 0 <= args.gap < 1:
+        raise ValueError("MIP gap must be in the interval [0, 1).")
+    if args.nearest is not None and args.nearest <= 0:
+        raise ValueError("Number of nearest candidates must be positive.")
+    if args.aggregate is not None and args.aggregate < 0:
+        raise ValueError("Aggregation tolerance can't be negative.")
 
-    option = sys.argv[1].upper()
-    if option not in ("A", "F"):
-        raise ValueError(
-            "Invalid value for option. It must be A (all ks) or F (first k)."
-        )
+    return alg.SolverOptions(
+        args.threads,
+        args.time_limit,
+        args.gap,
+        args.quiet,
+        args.nearest,
+        args.aggregate,
+    )
+
+
+def run_batch(parser: argparse.ArgumentParser, file: str):
+    """
+    Runs the subcommands listed in a file in this process.
+
+    Empty lines and lines starting with # are skipped. A failed subcommand is
+    reported and the batch continues with the next one, an interrupted one
+    (SIGINT) stops the batch. The speed declines of all change points found
+    by the first-k and all-ks subcommands are summarized in
+    <file name>-behavior-summary.txt.
 
-    region = sys.argv[2].upper()
+    Args:
+        parser (argparse.ArgumentParser): The command line parser.
+        file (str): The file with one subcommand per line.
+
+    Raises:
+        ValueError: If any of the subcommands failed.
+        KeyboardInterrupt: If a subcommand was interrupted.
+    """
+    with open(file, "r") as f:
+        lines = [line.strip() for line in f]
+
+    summary = alg.BehaviorSummary()
+    failed = 0
     try:
-        p = int(sys.argv[3])
-        if p <= 0:
-            raise ValueError("P must be a positive integer.")
-    except ValueError as e:
-        raise ValueError(
-            "Invalid value for P. It must be a positive integer."
-        ) from e
+        for line in lines:
+            if not line or line.startswith("#"):
+                continue
 
-    return option, region, p
+            print(f"Running: {line}")
+            try:
+                args = parser.parse_args(shlex.split(line))
+                if args.command == "batch":
+                    raise ValueError("Batch can't run another batch.")
+                run(parser, args, summary)
+            except SystemExit:
+                # The parser has already printed the usage error.
+                failed += 1
+            except Exception as e:
+                print(f"Error in '{line}': {e}", file=sys.stderr)
+                failed += 1
+    finally:
+        # The change points of the finished subcommands are kept even if the
+        # batch is interrupted.
+        if summary.experiments:
+            name = os.path.splitext(os.path.basename(file))[0]
+            alg.output_behavior_summary(summary, f"{name}-behavior-summary")
 
+    if failed:
+        raise ValueError(f"{failed} subcommands of the batch failed.")
 
-def main():
+
+def run(
+    parser: argparse.ArgumentParser,
+    args: argparse.Namespace,
+    summary: "alg.BehaviorSummary | None" = None,
+):
     """
-    Main function.
+    Runs one subcommand.
+
+    Args:
+        parser (argparse.ArgumentParser): The command line parser.
+        args (argparse.Namespace): Parsed arguments of the subcommand.
+        summary (alg.BehaviorSummary | None, optional): Collects the speed
+        declines of the change points of the experiment.
     """
-    try:
-        option, region, p = parse_arguments()
-        graph = gh.Graph(region)
+    if args.command == "batch":
+        run_batch(parser, args.file)
+        return
 
-        frac_list = alg.get_frac_list(graph)
-        denominator = sum(frac_list)
+    options = None
+    if args.command != "evaluate":
+        options = get_solver_options(args)
 
-        k_upper_limit = alg.get_k_upper_limit(frac_list, denominator) - 1
+    graph = gh.Graph(args.region, args.contract)
 
-        if option == "A":
-            alg.calculate_all_ks(
-                graph, frac_list, denominator, k_upper_limit, p
-            )
-        elif option == "F":
-            alg.calculate_first_k(
-                graph, frac_list, denominator, k_upper_limit, p
+    if args.command == "criticality":
+        alg.calculate_edge_criticality(graph, args.p, options=options)
+        return
+
+    frac_list = alg.get_frac_list(graph)
+    denominator = sum(frac_list)
+
+    k_upper_limit = alg.get_k_upper_limit(frac_list, denominator) - 1
+
+    if args.command == "evaluate":
+        if not 0 <= args.k <= k_upper_limit:
+            raise ValueError(f"k must be in the interval [0, {k_upper_limit}].")
+        # Only cities are facility candidates, if the region has junctions.
+        num_of_candidates = graph.city_bound or graph.num_of_verts
+        if not all(0 <= m < num_of_candidates for m in args.medians):
+            raise ValueError(
+                f"Median labels must be in the interval "
+                f"[0, {num_of_candidates - 1}]."
             )
+        if len(set(args.medians)) != len(args.medians):
+            raise ValueError("Median labels must be unique.")
+        objective = alg.evaluate_medians(
+            graph, frac_list, denominator, args.k, args.medians
+        )
+        print(f"Objective value: {objective:.4f}")
+    elif args.command == "all-ks":
+        alg.calculate_all_ks(
+            graph,
+            frac_list,
+            denominator,
+            k_upper_limit,
+            args.p,
+            options,
+            alg.print_progress,
+            args.resume,
+            summary,
+        )
+    elif args.command == "first-k":
+        alg.calculate_first_k(
+            graph,
+            frac_list,
+            denominator,
+            k_upper_limit,
+            args.p,
+            options,
+            alg.print_progress,
+            args.resume,
+            summary,
+        )
+    elif args.command == "breakpoints":
+        alg.calculate_breakpoints(
+            graph,
+            frac_list,
+            denominator,
+            k_upper_limit,
+            args.p,
+            options,
+            alg.print_progress,
+            args.resume,
+        )
+
+
+def print_timings():
+    """
+    Prints the import time of the command line and the algorithms and graph
+    packages, of each library and submodule of algorithms loaded later and
+    the total run time.
+    """
+    print("Import times:")
+    print(f"  main, algorithms and graph: {STARTED - START:.4f} s")
+    for module, seconds in alg.import_times.items():
+        print(f"  {module}: {seconds:.4f} s")
+    print(f"Total time: {time.perf_counter() - START:.4f} s")
 
+
+def main():
+    """
+    Main function.
+    """
+    parser = create_parser()
+    args = parser.parse_args()
+
+    try:
+        run(parser, args)
+    except KeyboardInterrupt:
+        print("Interrupted.", file=sys.stderr)
+        sys.exit(130)
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)
+    finally:
+        if args.timings:
+            print_timings()
 
 
 if __name__ == "__main__":